@@ -0,0 +1,182 @@
+# admission.py
+"""
+메모리 기반 요청 수용 제어 (Admission Control)
+
+요청별 최대 메모리 사용량 추정치(preprocess_core.estimate_peak_memory)를
+워커당 메모리 예산과 비교하여 즉시 수용, 대기열 대기, 거절 중 하나로 결정합니다.
+
+결정 규칙:
+    - 추정치가 예산 전체보다 크면 즉시 거절 (413)
+    - 예산에 여유가 있고 대기 중인 요청이 없으면 즉시 수용
+    - 그 외에는 대기열에서 대기 (FIFO), 대기열이 가득 찼거나 대기 시간 초과 시 거절 (503)
+"""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Any, Tuple
+
+
+class AdmissionRejected(Exception):
+    """
+    요청 거절 예외
+
+    Attributes:
+        status_code: 응답 HTTP 상태 코드 (413: 예산 초과, 503: 대기열 포화/시간 초과)
+        estimate_bytes: 요청의 메모리 추정치
+    """
+
+    def __init__(self, message: str, status_code: int, estimate_bytes: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.estimate_bytes = estimate_bytes
+
+
+class MemoryAdmissionController:
+    """
+    워커당 메모리 예산 기반 수용 제어기 (asyncio 이벤트 루프 내에서 사용)
+
+    Args:
+        budget_bytes: 동시에 처리 중인 요청들의 추정 메모리 합계 상한
+        max_queued: 대기열 최대 길이
+        queue_timeout_seconds: 대기열 최대 대기 시간(초)
+    """
+
+    def __init__(self, budget_bytes: int, max_queued: int = 16, queue_timeout_seconds: float = 30.0):
+        self.budget_bytes = budget_bytes
+        self.max_queued = max_queued
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._in_use_bytes = 0
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+
+        # 메트릭
+        self._counters: Dict[str, int] = {
+            "admitted": 0,
+            "admitted_after_queue": 0,
+            "rejected_over_budget": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+        }
+        self._peak_in_use_bytes = 0
+        self._last_estimate_bytes = 0
+        self._max_estimate_bytes = 0
+        self._estimate_total_bytes = 0
+        self._estimate_count = 0
+
+    @asynccontextmanager
+    async def reserve(self, estimate_bytes: int) -> AsyncIterator[str]:
+        """
+        추정 메모리를 예약하고 블록 종료 시 반환
+
+        Yields:
+            결정 결과 ("admitted" 또는 "queued")
+
+        Raises:
+            AdmissionRejected: 수용할 수 없는 경우
+        """
+        decision = await self._acquire(estimate_bytes)
+        try:
+            yield decision
+        finally:
+            self._release(estimate_bytes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 및 누적 메트릭"""
+        return {
+            "budget_bytes": self.budget_bytes,
+            "in_use_bytes": self._in_use_bytes,
+            "peak_in_use_bytes": self._peak_in_use_bytes,
+            "queued": len(self._waiters),
+            "last_estimate_bytes": self._last_estimate_bytes,
+            "max_estimate_bytes": self._max_estimate_bytes,
+            "mean_estimate_bytes": (
+                self._estimate_total_bytes // self._estimate_count if self._estimate_count else 0
+            ),
+            **self._counters,
+        }
+
+    def _record_estimate(self, estimate_bytes: int) -> None:
+        self._last_estimate_bytes = estimate_bytes
+        self._max_estimate_bytes = max(self._max_estimate_bytes, estimate_bytes)
+        self._estimate_total_bytes += estimate_bytes
+        self._estimate_count += 1
+
+    def _fits(self, estimate_bytes: int) -> bool:
+        return self._in_use_bytes + estimate_bytes <= self.budget_bytes
+
+    def _take(self, estimate_bytes: int) -> None:
+        self._in_use_bytes += estimate_bytes
+        self._peak_in_use_bytes = max(self._peak_in_use_bytes, self._in_use_bytes)
+
+    async def _acquire(self, estimate_bytes: int) -> str:
+        self._record_estimate(estimate_bytes)
+
+        if estimate_bytes > self.budget_bytes:
+            self._counters["rejected_over_budget"] += 1
+            raise AdmissionRejected(
+                f"요청의 예상 메모리({estimate_bytes} bytes)가 워커 예산({self.budget_bytes} bytes)을 초과합니다",
+                status_code=413, estimate_bytes=estimate_bytes,
+            )
+
+        # 대기 중인 요청이 있으면 순서를 지키기 위해 새 요청도 대기열로
+        if not self._waiters and self._fits(estimate_bytes):
+            self._take(estimate_bytes)
+            self._counters["admitted"] += 1
+            return "admitted"
+
+        if len(self._waiters) >= self.max_queued:
+            self._counters["rejected_queue_full"] += 1
+            raise AdmissionRejected(
+                "처리 대기열이 가득 찼습니다", status_code=503, estimate_bytes=estimate_bytes,
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, estimate_bytes)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            # 시간 초과와 동시에 수용된 경우에는 예약을 유지
+            if not waiter.done():
+                waiter.cancel()
+                self._remove_waiter(entry)
+                self._counters["rejected_timeout"] += 1
+                raise AdmissionRejected(
+                    "메모리 예산 대기 시간이 초과되었습니다", status_code=503, estimate_bytes=estimate_bytes,
+                )
+        except BaseException:
+            # 클라이언트 연결 종료 등으로 취소된 경우, 이미 수용되었다면 예약 반환
+            if waiter.done() and not waiter.cancelled():
+                self._release(estimate_bytes)
+            else:
+                waiter.cancel()
+                self._remove_waiter(entry)
+            raise
+
+        self._counters["admitted"] += 1
+        self._counters["admitted_after_queue"] += 1
+        return "queued"
+
+    def _remove_waiter(self, entry: Tuple[asyncio.Future, int]) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+        self._wake_waiters()
+
+    def _release(self, estimate_bytes: int) -> None:
+        self._in_use_bytes -= estimate_bytes
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # 대기열 앞에서부터 예산에 맞는 요청을 순서대로 수용 (FIFO, 앞 요청이 안 맞으면 중단)
+        while self._waiters:
+            waiter, estimate_bytes = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(estimate_bytes):
+                break
+            self._waiters.popleft()
+            self._take(estimate_bytes)
+            waiter.set_result(None)
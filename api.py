@@ -10,13 +10,39 @@ preprocess_core.py의 함수를 재사용하여 로직 중복을 방지합니다
 
 API 문서:
     http://localhost:8000/docs (Swagger UI)
+
+환경 변수:
+    IMAGE_STORE_MAX_BYTES: /images 저장소 최대 용량 (기본값 512MB)
+    IMAGE_STORE_TTL_SECONDS: /images 저장 항목 만료 시간 (기본값 600초)
+    CACHE_CONTROL: 처리 결과 응답의 Cache-Control 헤더 (기본값 "private, max-age=3600")
+    MEMORY_BUDGET_BYTES: 워커당 동시 처리 메모리 예산 (기본값 2GB)
+    ADMISSION_MAX_QUEUED: 메모리 예산 대기열 최대 길이 (기본값 16)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: 대기열 최대 대기 시간 (기본값 30초)
+    PROFILING_ENABLED: 요청별 프로파일링 허용 여부 (기본값 "0", "1"이면 허용)
+    PROFILE_OUTPUT_DIR: 프로파일 결과 저장 디렉터리 (기본값 "profiles")
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
-from preprocess_core import dicom_to_pil, apply_clahe, apply_edge
+from fastapi import FastAPI, UploadFile, File, Form, Query, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from preprocess_core import (
+    dicom_to_pil, decode_dicom, normalize_to_pil, get_window_values, downscale_for_preview,
+    read_dicom_header, estimate_peak_memory, estimate_dicom_peak_memory,
+    apply_clahe, apply_edge, detect_edges,
+)
+from edge_codec import encode_edge_map
+from image_store import ImageStore, StoredImage
+from admission import MemoryAdmissionController, AdmissionRejected
+from profiling import run_profiled, load_summary
+from PIL import Image
+from pydicom.multival import MultiValue
 import base64
+import hashlib
+import json
+import os
+import numpy as np
+from contextlib import AsyncExitStack, asynccontextmanager
 from io import BytesIO
-from typing import Literal
+from typing import Any, AsyncIterator, Callable, Literal, Optional, Tuple, Union
 
 # FastAPI 앱 초기화
 app = FastAPI(
@@ -28,46 +54,124 @@ app = FastAPI(
 # 유효한 전처리 모드 정의
 ValidModes = Literal["원본만 보기", "CLAHE 대비 향상", "에지 검출(Canny)"]
 ValidNormalizeModes = Literal["minmax", "window"]
+ValidResponseFormats = Literal["json", "png", "binary"]
+ValidEdgeFormats = Literal["png", "packed", "coords"]
 
-@app.post("/preprocess")
-async def preprocess_dicom(
-    file: UploadFile = File(..., description="DICOM 파일 (.dcm)"),
-    mode: ValidModes = Form("원본만 보기", description="전처리 모드"),
-    normalize_mode: ValidNormalizeModes = Form("minmax", description="정규화 방식"),
-    clip_limit: float = Form(2.0, description="CLAHE clip limit (1.0~5.0)"),
-    tile_grid_size: int = Form(8, description="CLAHE tile size (4~16)"),
-    canny_t1: int = Form(50, description="Canny 하위 임계값"),
-    canny_t2: int = Form(150, description="Canny 상위 임계값"),
-):
+# API 전처리 모드 → preprocess_core 파이프라인 이름 (메모리 추정용)
+_PIPELINES = {"원본만 보기": "original", "CLAHE 대비 향상": "clahe", "에지 검출(Canny)": "edge"}
+
+# 업로드 1회 + 참조 렌더링용 디코딩 결과 저장소
+IMAGE_STORE_MAX_BYTES = int(os.getenv("IMAGE_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+IMAGE_STORE_TTL_SECONDS = float(os.getenv("IMAGE_STORE_TTL_SECONDS", "600"))
+image_store = ImageStore(max_bytes=IMAGE_STORE_MAX_BYTES, ttl_seconds=IMAGE_STORE_TTL_SECONDS)
+
+# HTTP 조건부 캐싱: 결과는 (파일 내용, 파라미터)의 순수 함수이므로 재사용 가능
+CACHE_CONTROL = os.getenv("CACHE_CONTROL", "private, max-age=3600")
+
+# 메모리 기반 수용 제어: 헤더로 추정한 최대 메모리를 워커 예산과 비교하여 수용/대기/거절
+MEMORY_BUDGET_BYTES = int(os.getenv("MEMORY_BUDGET_BYTES", str(2 * 1024 * 1024 * 1024)))
+ADMISSION_MAX_QUEUED = int(os.getenv("ADMISSION_MAX_QUEUED", "16"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+admission = MemoryAdmissionController(
+    budget_bytes=MEMORY_BUDGET_BYTES,
+    max_queued=ADMISSION_MAX_QUEUED,
+    queue_timeout_seconds=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+
+# 요청별 프로파일링 (X-Profile: 1 헤더 또는 ?profile=1, 설정으로 허용된 경우에만 동작)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
+
+def _mode_params(
+    mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str = "png",
+) -> dict:
     """
-    DICOM 파일 전처리 API
+    선택된 모드에서 실제로 결과에 영향을 주는 파라미터만 반환
 
-    업로드된 DICOM 파일에 전처리를 적용하고 Base64 PNG로 반환합니다.
+    edge_format은 기본값("png")이 아닐 때만 포함하여 기존 응답의 params 형태와 ETag를 유지합니다.
+    """
+    if mode == "CLAHE 대비 향상":
+        return {"clip_limit": clip_limit, "tile_grid_size": tile_grid_size}
+    elif mode == "에지 검출(Canny)":
+        params = {"threshold1": canny_t1, "threshold2": canny_t2}
+        if edge_format != "png":
+            params["edge_format"] = edge_format
+        return params
+    return {}
 
-    Returns:
-        - status: 처리 결과 ("success")
-        - mode: 적용된 전처리 모드
-        - params: 적용된 파라미터
-        - dicom_metadata: DICOM 메타데이터 (patient_id, modality, window_center, window_width)
-        - image_data: Base64 인코딩된 PNG 이미지
+
+def _make_etag(content_hash: str, params: dict) -> str:
+    """파일 내용 해시 + 파라미터로 결정적인(strong) ETag 생성"""
+    key = content_hash + json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 확인 (목록, *, W/ 접두사 지원)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag: str) -> dict:
+    """캐시 검증자 응답 헤더"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def _validate_formats(mode: str, edge_format: str, response_format: str) -> None:
     """
-    # Step 1: 파일 읽기
-    try:
-        file_bytes = await file.read()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"파일 읽기 오류: {e}")
+    응답 형식 조합 검증 (잘못된 조합은 422)
 
-    # Step 2: DICOM → PIL 변환
-    try:
-        original_img, dcm_data = dicom_to_pil(file_bytes, normalize_mode=normalize_mode)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"처리 중 오류: {e}")
+    binary는 에지 모드에서 edge_format이 packed/coords인 경우에만 사용할 수 있고,
+    packed/coords 에지 맵은 PNG가 아니므로 response_format=png로 요청할 수 없습니다.
+    """
+    compact_edges = mode == "에지 검출(Canny)" and edge_format != "png"
+    if response_format == "binary" and not compact_edges:
+        raise HTTPException(
+            status_code=422,
+            detail="response_format=binary는 에지 모드에서 edge_format이 packed/coords인 경우에만 사용할 수 있습니다",
+        )
+    if response_format == "png" and compact_edges:
+        raise HTTPException(
+            status_code=422,
+            detail=f"edge_format={edge_format} 결과는 PNG가 아닙니다 (response_format=json 또는 binary 사용)",
+        )
 
-    # Step 3: 전처리 적용
+
+def _not_modified(etag: str) -> Response:
+    """304 Not Modified 응답 (본문 없음)"""
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def _apply_mode(
+    original_img: Image.Image,
+    mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str = "png",
+) -> Tuple[Union[Image.Image, np.ndarray], dict]:
+    """
+    선택된 전처리 모드를 적용하고 (처리 결과, 적용 파라미터) 반환
+
+    에지 모드에서 edge_format이 "png"가 아니면 RGB 이미지 대신 (H, W) 에지 맵 배열을 반환합니다.
+    """
     processed_img = original_img
-    applied_params = {}
 
     if mode == "CLAHE 대비 향상":
         processed_img = apply_clahe(
@@ -75,7 +179,13 @@ async def preprocess_dicom(
             clip_limit=clip_limit,
             tile_grid_size=tile_grid_size
         )
-        applied_params = {"clip_limit": clip_limit, "tile_grid_size": tile_grid_size}
+
+    elif mode == "에지 검출(Canny)" and edge_format != "png":
+        processed_img = detect_edges(
+            original_img,
+            threshold1=canny_t1,
+            threshold2=canny_t2
+        )
 
     elif mode == "에지 검출(Canny)":
         processed_img = apply_edge(
@@ -83,36 +193,642 @@ async def preprocess_dicom(
             threshold1=canny_t1,
             threshold2=canny_t2
         )
-        applied_params = {"threshold1": canny_t1, "threshold2": canny_t2}
 
-    # Step 4: PNG → Base64 변환
-    output_buffer = BytesIO()
-    processed_img.save(output_buffer, format="PNG")
-    img_base64 = base64.b64encode(output_buffer.getvalue()).decode("utf-8")
+    return processed_img, _mode_params(mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format)
 
-    # Step 5: 메타데이터 추출
+
+def _extract_metadata(dcm_data) -> dict:
+    """응답에 포함할 DICOM 메타데이터 추출"""
     wc_value = dcm_data.get('WindowCenter', 'N/A')
     ww_value = dcm_data.get('WindowWidth', 'N/A')
-    if isinstance(wc_value, (list, tuple)):
+    if isinstance(wc_value, (list, tuple, MultiValue)):
         wc_value = wc_value[0]
-    if isinstance(ww_value, (list, tuple)):
+    if isinstance(ww_value, (list, tuple, MultiValue)):
         ww_value = ww_value[0]
 
-    metadata = {
+    return {
         "patient_id": dcm_data.get('PatientID', 'N/A'),
         "modality": dcm_data.get('Modality', 'N/A'),
         "window_center": wc_value,
         "window_width": ww_value,
     }
 
-    # Step 6: JSON 응답
-    return JSONResponse(content={
+
+def _build_response(
+    mode: str,
+    applied_params: dict,
+    metadata: dict,
+    processed_img: Union[Image.Image, np.ndarray],
+    response_format: str = "json",
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    처리 결과 응답 생성
+
+    response_format이 "png"이면 PNG 바이너리를 그대로 반환하고,
+    "json"이면 PNG → Base64로 인코딩하여 JSON으로 반환합니다.
+    처리 결과가 에지 맵 배열이면 _build_edge_response로 압축 인코딩합니다.
+    """
+    if isinstance(processed_img, np.ndarray):
+        return _build_edge_response(mode, applied_params, metadata, processed_img, response_format, headers)
+
+    if response_format == "png":
+        return Response(content=_encode_png(processed_img), media_type="image/png", headers=headers)
+
+    return JSONResponse(headers=headers, content={
         "status": "success",
         "mode": mode,
         "params": applied_params,
         "dicom_metadata": metadata,
-        "image_data": {
-            "mime_type": "image/png",
-            "base64_string": img_base64
+        "image_data": _image_payload(processed_img),
+    })
+
+
+def _encode_png(img: Image.Image) -> bytes:
+    output_buffer = BytesIO()
+    img.save(output_buffer, format="PNG")
+    return output_buffer.getvalue()
+
+
+def _image_payload(img: Image.Image) -> dict:
+    """JSON 응답의 image_data 항목 (PNG → Base64)"""
+    return {
+        "mime_type": "image/png",
+        "base64_string": base64.b64encode(_encode_png(img)).decode("utf-8")
+    }
+
+
+def _edge_payload(edges: np.ndarray, edge_format: str) -> Tuple[bytes, dict]:
+    """에지 맵 인코딩 결과와 JSON 응답의 edge_data 항목"""
+    data, info = encode_edge_map(edges, edge_format)
+    return data, {**info, "base64_string": base64.b64encode(data).decode("utf-8")}
+
+
+def _result_payload(processed: Union[Image.Image, np.ndarray], applied_params: dict) -> dict:
+    """처리 결과를 JSON 항목으로 변환 (이미지면 image_data, 에지 맵 배열이면 edge_data)"""
+    if isinstance(processed, np.ndarray):
+        return {"edge_data": _edge_payload(processed, applied_params["edge_format"])[1]}
+    return {"image_data": _image_payload(processed)}
+
+
+def _build_edge_response(
+    mode: str,
+    applied_params: dict,
+    metadata: dict,
+    edges: np.ndarray,
+    response_format: str = "json",
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    에지 맵 압축 응답 생성 (edge_codec 형식)
+
+    response_format이 "binary"이면 인코딩된 바이트를 application/octet-stream으로 반환하고
+    형식/크기는 X-Edge-Format, X-Edge-Shape("H,W") 헤더로 전달합니다.
+    "json"이면 image_data 대신 edge_data 항목에 Base64로 담아 반환합니다.
+    """
+    data, payload = _edge_payload(edges, applied_params["edge_format"])
+
+    if response_format == "binary":
+        edge_headers = {
+            **(headers or {}),
+            "X-Edge-Format": payload["format"],
+            "X-Edge-Shape": ",".join(str(v) for v in payload["shape"]),
         }
-    })
\ No newline at end of file
+        return Response(content=data, media_type="application/octet-stream", headers=edge_headers)
+
+    return JSONResponse(headers=headers, content={
+        "status": "success",
+        "mode": mode,
+        "params": applied_params,
+        "dicom_metadata": metadata,
+        "edge_data": payload,
+    })
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """업로드 파일 읽기 (실패 시 400)"""
+    try:
+        return await file.read()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"파일 읽기 오류: {e}")
+
+
+def _estimate_upload_memory(file_bytes: bytes, pipeline: Optional[str]) -> int:
+    """업로드 파일의 헤더만 읽어 처리 최대 메모리 추정 (업로드 바이트 포함, 실패 시 422)"""
+    try:
+        header = read_dicom_header(file_bytes)
+        return len(file_bytes) + estimate_dicom_peak_memory(header, pipeline=pipeline)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@asynccontextmanager
+async def _admit(estimate_bytes: int) -> AsyncIterator[dict]:
+    """
+    메모리 예산 수용 제어 (거절 시 413/503)
+
+    Yields:
+        응답에 추가할 헤더 (X-Memory-Estimate, X-Admission)
+    """
+    try:
+        async with admission.reserve(estimate_bytes) as decision:
+            yield {"X-Memory-Estimate": str(estimate_bytes), "X-Admission": decision}
+    except AdmissionRejected as e:
+        headers = {"X-Memory-Estimate": str(e.estimate_bytes), "X-Admission": "rejected"}
+        if e.status_code == 503:
+            headers["Retry-After"] = str(int(ADMISSION_QUEUE_TIMEOUT_SECONDS))
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+
+def _profile_requested(request: Request) -> bool:
+    """요청이 프로파일링을 요청했는지 확인 (X-Profile 헤더 또는 profile 쿼리)"""
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+async def _run_worker(
+    request: Request,
+    label: str,
+    fn: Callable[..., Any],
+    *args: Any,
+) -> Tuple[Any, Optional[str]]:
+    """
+    스레드 풀에서 fn 실행, 프로파일링이 허용되고 요청된 경우 cProfile + tracemalloc으로 측정
+
+    Returns:
+        (fn 반환값, profile_id 또는 None) 튜플
+    """
+    if PROFILING_ENABLED and _profile_requested(request):
+        result, report = await run_in_threadpool(run_profiled, label, PROFILE_OUTPUT_DIR, fn, *args)
+        return result, report.profile_id
+    return await run_in_threadpool(fn, *args), None
+
+
+def _with_profile_header(response: Response, profile_id: Optional[str]) -> Response:
+    if profile_id is not None:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _process_upload(
+    file_bytes: bytes,
+    mode: str,
+    normalize_mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str,
+    response_format: str,
+    headers: dict,
+) -> Response:
+    """업로드 파일 디코딩 + 전처리 + 인코딩 (스레드 풀에서 실행)"""
+    # DICOM → PIL 변환
+    try:
+        original_img, dcm_data = dicom_to_pil(file_bytes, normalize_mode=normalize_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"처리 중 오류: {e}")
+
+    # 전처리 적용
+    processed_img, applied_params = _apply_mode(
+        original_img, mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format
+    )
+
+    # PNG → Base64 변환 및 응답
+    return _build_response(
+        mode, applied_params, _extract_metadata(dcm_data), processed_img,
+        response_format=response_format, headers=headers
+    )
+
+
+@app.post("/preprocess")
+async def preprocess_dicom(
+    request: Request,
+    file: UploadFile = File(..., description="DICOM 파일 (.dcm)"),
+    mode: ValidModes = Form("원본만 보기", description="전처리 모드"),
+    normalize_mode: ValidNormalizeModes = Form("minmax", description="정규화 방식"),
+    clip_limit: float = Form(2.0, description="CLAHE clip limit (1.0~5.0)"),
+    tile_grid_size: int = Form(8, description="CLAHE tile size (4~16)"),
+    canny_t1: int = Form(50, description="Canny 하위 임계값"),
+    canny_t2: int = Form(150, description="Canny 상위 임계값"),
+    edge_format: ValidEdgeFormats = Form("png", description="에지 맵 형식 (png, packed: 비트 압축, coords: 좌표 목록)"),
+    response_format: ValidResponseFormats = Form("json", description="응답 형식 (json: Base64, png: PNG 바이너리, binary: 에지 맵 압축 바이트)"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    DICOM 파일 전처리 API
+
+    업로드된 DICOM 파일에 전처리를 적용하고 Base64 PNG로 반환합니다.
+    응답에는 파일 내용과 파라미터로 계산한 ETag가 포함되며,
+    If-None-Match가 일치하면 디코딩 없이 304를 반환합니다.
+    디코딩 전에 헤더로 최대 메모리를 추정하여 워커 예산을 초과하면 대기 또는 거절(413/503)합니다.
+    PROFILING_ENABLED=1일 때 X-Profile: 1 헤더(또는 ?profile=1)를 보내면 처리 과정을
+    프로파일링하고 X-Profile-Id 헤더로 결과 ID를 반환합니다 (GET /profiles/{profile_id}).
+
+    Returns:
+        - status: 처리 결과 ("success")
+        - mode: 적용된 전처리 모드
+        - params: 적용된 파라미터
+        - dicom_metadata: DICOM 메타데이터 (patient_id, modality, window_center, window_width)
+        - image_data: Base64 인코딩된 PNG 이미지
+        - edge_data: 에지 모드에서 edge_format이 packed/coords인 경우 image_data 대신
+          {format, shape, edge_pixels, base64_string} (edge_codec.decode_edge_payload로 복원)
+        - response_format=binary: 인코딩된 에지 맵 바이트 (application/octet-stream,
+          X-Edge-Format / X-Edge-Shape 헤더, edge_codec.decode_edge_response로 복원)
+    """
+    # Step 1: 파일 읽기
+    _validate_formats(mode, edge_format, response_format)
+    file_bytes = await _read_upload(file)
+
+    # Step 1-1: ETag 계산, 클라이언트 캐시가 유효하면 디코딩 전에 304 반환
+    etag = _make_etag(hashlib.sha256(file_bytes).hexdigest(), {
+        "mode": mode,
+        "normalize_mode": normalize_mode,
+        "response_format": response_format,
+        **_mode_params(mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format),
+    })
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    # Step 2: 헤더로 메모리 추정 후 수용 제어
+    estimate = _estimate_upload_memory(file_bytes, _PIPELINES[mode])
+    async with _admit(estimate) as admission_headers:
+        # Step 3: 디코딩 + 전처리 + 인코딩 (이벤트 루프를 막지 않도록 스레드 풀에서 실행)
+        response, profile_id = await _run_worker(
+            request, "preprocess", _process_upload,
+            file_bytes, mode, normalize_mode, clip_limit, tile_grid_size, canny_t1, canny_t2,
+            edge_format, response_format, {**_cache_headers(etag), **admission_headers},
+        )
+    return _with_profile_header(response, profile_id)
+
+
+def _render_stage(
+    stage: str,
+    pixels: np.ndarray,
+    window_center: Optional[float],
+    window_width: Optional[float],
+    metadata: dict,
+    mode: str,
+    normalize_mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str,
+    preview_max_size: Optional[int] = None,
+) -> bytes:
+    """
+    점진적 렌더링 한 단계의 정규화 + 전처리 + 인코딩 (스레드 풀에서 실행)
+
+    preview_max_size가 주어지면 디코딩된 배열을 축소한 뒤 처리합니다 (미리보기는 항상 PNG).
+
+    Returns:
+        NDJSON 한 줄 (UTF-8)
+    """
+    scale = 1.0
+    if preview_max_size is not None:
+        pixels, scale = downscale_for_preview(pixels, preview_max_size)
+        edge_format = "png"
+
+    original_img = normalize_to_pil(pixels, normalize_mode, window_center, window_width)
+    processed, applied_params = _apply_mode(
+        original_img, mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format
+    )
+    line = {
+        "stage": stage,
+        "status": "success",
+        "mode": mode,
+        "params": applied_params,
+        "scale": round(scale, 6),
+        "width": original_img.width,
+        "height": original_img.height,
+        "dicom_metadata": metadata,
+        **_result_payload(processed, applied_params),
+    }
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _progressive_stream(
+    pixels: np.ndarray,
+    window_center: Optional[float],
+    window_width: Optional[float],
+    metadata: dict,
+    preview_max_size: int,
+    *render_args: Any,
+) -> AsyncIterator[bytes]:
+    """미리보기 → 최종 결과 순서로 NDJSON 줄 전송"""
+    stages = [("final", None)]
+    if max(pixels.shape[:2]) > preview_max_size:
+        stages.insert(0, ("preview", preview_max_size))
+
+    for stage, max_size in stages:
+        try:
+            yield await run_in_threadpool(
+                _render_stage, stage, pixels, window_center, window_width, metadata,
+                *render_args, max_size
+            )
+        except Exception as e:
+            # 응답 상태 코드는 이미 전송되었으므로 오류를 마지막 줄로 알림
+            error = {"stage": stage, "status": "error", "detail": f"처리 중 오류: {e}"}
+            yield (json.dumps(error, ensure_ascii=False) + "\n").encode("utf-8")
+            return
+
+
+class _HeldStreamingResponse(StreamingResponse):
+    """
+    전송이 끝나면 넘겨받은 정리 작업(메모리 예산 예약 해제)을 실행하는 StreamingResponse
+
+    본문 생성기가 한 번도 시작되지 않아도(응답 시작 실패, 클라이언트 조기 종료) 해제되도록
+    생성기 안이 아닌 응답 전송 전체를 감싸 finally에서 해제합니다.
+    AsyncExitStack.aclose()는 두 번 호출되어도 안전합니다.
+    """
+
+    def __init__(self, content: AsyncIterator[bytes], held: AsyncExitStack, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self._held = held
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._held.aclose()
+
+
+@app.post("/preprocess/stream")
+async def preprocess_stream(
+    file: UploadFile = File(..., description="DICOM 파일 (.dcm)"),
+    mode: ValidModes = Form("원본만 보기", description="전처리 모드"),
+    normalize_mode: ValidNormalizeModes = Form("minmax", description="정규화 방식"),
+    clip_limit: float = Form(2.0, description="CLAHE clip limit (1.0~5.0)"),
+    tile_grid_size: int = Form(8, description="CLAHE tile size (4~16)"),
+    canny_t1: int = Form(50, description="Canny 하위 임계값"),
+    canny_t2: int = Form(150, description="Canny 상위 임계값"),
+    edge_format: ValidEdgeFormats = Form("png", description="최종 결과의 에지 맵 형식 (png, packed, coords)"),
+    preview_max_size: int = Form(512, ge=16, description="미리보기 긴 변의 최대 픽셀 수"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    점진적 렌더링 API (NDJSON 스트리밍)
+
+    한 번 디코딩한 배열로 저해상도 미리보기를 먼저 보내고, 이어서 전체 해상도 결과를 보냅니다.
+    응답은 application/x-ndjson이며 한 줄이 한 단계의 JSON입니다.
+    영상의 긴 변이 preview_max_size 이하이면 미리보기 없이 최종 결과만 보냅니다.
+    ETag/304, 메모리 수용 제어(413/503), 디코딩 실패(422)는 스트리밍 시작 전에 /preprocess와 같이 처리됩니다.
+
+    Returns (줄마다):
+        - stage: "preview" 또는 "final" (오류 시 status="error", detail)
+        - scale: 원본 대비 축소 비율, width/height: 해당 단계 이미지 크기
+        - mode, params, dicom_metadata, image_data (최종 단계 에지 모드는 edge_format에 따라 edge_data)
+    """
+    file_bytes = await _read_upload(file)
+
+    etag = _make_etag(hashlib.sha256(file_bytes).hexdigest(), {
+        "mode": mode,
+        "normalize_mode": normalize_mode,
+        "response_format": "ndjson",
+        "preview_max_size": preview_max_size,
+        **_mode_params(mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format),
+    })
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    estimate = _estimate_upload_memory(file_bytes, _PIPELINES[mode])
+    async with AsyncExitStack() as exit_stack:
+        admission_headers = await exit_stack.enter_async_context(_admit(estimate))
+        try:
+            pixels, dcm_data = await run_in_threadpool(decode_dicom, file_bytes)
+            wc, ww = get_window_values(dcm_data)
+            metadata = _extract_metadata(dcm_data)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"처리 중 오류: {e}")
+
+        # 응답 전송이 끝날 때까지 예약을 유지하도록 정리 책임을 응답 객체로 넘김
+        held = exit_stack.pop_all()
+
+    return _HeldStreamingResponse(
+        _progressive_stream(
+            pixels, wc, ww, metadata, preview_max_size,
+            mode, normalize_mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format,
+        ),
+        held,
+        media_type="application/x-ndjson",
+        headers={**_cache_headers(etag), **admission_headers, "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/images")
+async def upload_image(
+    request: Request,
+    file: UploadFile = File(..., description="DICOM 파일 (.dcm)"),
+):
+    """
+    DICOM 업로드 및 디코딩 결과 저장 API
+
+    파일을 한 번만 디코딩하여 저장소에 보관하고 image_id를 반환합니다.
+    이후 /images/{image_id}/render로 재업로드 없이 모드/파라미터를 바꿔 렌더링할 수 있습니다.
+
+    Returns:
+        - status: 처리 결과 ("success")
+        - image_id: 렌더링 요청에 사용할 ID
+        - shape: 디코딩된 픽셀 배열 크기
+        - dicom_metadata: DICOM 메타데이터
+        - ttl_seconds: 마지막 접근 이후 만료까지의 시간(초)
+    """
+    file_bytes = await _read_upload(file)
+
+    estimate = _estimate_upload_memory(file_bytes, None)
+    async with _admit(estimate):
+        try:
+            (pixels, dcm_data), profile_id = await _run_worker(
+                request, "images_upload", decode_dicom, file_bytes
+            )
+            # 해석할 수 없는 WindowCenter/WindowWidth는 (None, None)으로 저장되어 minmax로 렌더링됨
+            wc, ww = get_window_values(dcm_data)
+            metadata = _extract_metadata(dcm_data)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"처리 중 오류: {e}")
+
+    try:
+        image_id = image_store.put(StoredImage(
+            pixels=pixels, window_center=wc, window_width=ww, metadata=metadata,
+            content_hash=hashlib.sha256(file_bytes).hexdigest()
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    return _with_profile_header(JSONResponse(content={
+        "status": "success",
+        "image_id": image_id,
+        "shape": list(pixels.shape),
+        "dicom_metadata": metadata,
+        "ttl_seconds": image_store.ttl_seconds,
+    }), profile_id)
+
+
+def _render_entry(
+    entry: StoredImage,
+    mode: str,
+    normalize_mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str,
+    response_format: str,
+    headers: dict,
+) -> Response:
+    """저장된 디코딩 결과로 정규화 + 전처리 + 인코딩 (스레드 풀에서 실행)"""
+    try:
+        original_img = normalize_to_pil(
+            entry.pixels, normalize_mode, entry.window_center, entry.window_width
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"처리 중 오류: {e}")
+
+    processed_img, applied_params = _apply_mode(
+        original_img, mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format
+    )
+    return _build_response(
+        mode, applied_params, entry.metadata, processed_img,
+        response_format=response_format, headers=headers
+    )
+
+
+async def _render_stored(
+    request: Request,
+    image_id: str,
+    mode: str,
+    normalize_mode: str,
+    clip_limit: float,
+    tile_grid_size: int,
+    canny_t1: int,
+    canny_t2: int,
+    edge_format: str,
+    response_format: str,
+    if_none_match: Optional[str],
+) -> Response:
+    """저장된 디코딩 결과로 정규화 + 전처리를 수행하여 응답 생성"""
+    _validate_formats(mode, edge_format, response_format)
+    entry = image_store.get(image_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"이미지를 찾을 수 없습니다 (만료 또는 삭제됨): {image_id}")
+
+    etag = _make_etag(entry.content_hash, {
+        "mode": mode,
+        "normalize_mode": normalize_mode,
+        "response_format": response_format,
+        **_mode_params(mode, clip_limit, tile_grid_size, canny_t1, canny_t2, edge_format),
+    })
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    # 이미 디코딩된 배열이므로 정규화 이후 단계만 추정 (추정에는 픽셀 수만 사용)
+    estimate = estimate_peak_memory(
+        rows=1, columns=int(entry.pixels.size), pipeline=_PIPELINES[mode], include_decode=False
+    )
+    async with _admit(estimate) as admission_headers:
+        response, profile_id = await _run_worker(
+            request, "images_render", _render_entry,
+            entry, mode, normalize_mode, clip_limit, tile_grid_size, canny_t1, canny_t2,
+            edge_format, response_format, {**_cache_headers(etag), **admission_headers},
+        )
+    return _with_profile_header(response, profile_id)
+
+
+@app.get("/images/{image_id}/render")
+async def render_image_get(
+    request: Request,
+    image_id: str,
+    mode: ValidModes = Query("원본만 보기", description="전처리 모드"),
+    normalize_mode: ValidNormalizeModes = Query("minmax", description="정규화 방식"),
+    clip_limit: float = Query(2.0, description="CLAHE clip limit (1.0~5.0)"),
+    tile_grid_size: int = Query(8, description="CLAHE tile size (4~16)"),
+    canny_t1: int = Query(50, description="Canny 하위 임계값"),
+    canny_t2: int = Query(150, description="Canny 상위 임계값"),
+    edge_format: ValidEdgeFormats = Query("png", description="에지 맵 형식 (png, packed: 비트 압축, coords: 좌표 목록)"),
+    response_format: ValidResponseFormats = Query("json", description="응답 형식 (json: Base64, png: PNG 바이너리, binary: 에지 맵 압축 바이트)"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    저장된 이미지 렌더링 API (GET, 쿼리 파라미터)
+
+    응답 형식과 ETag/304 처리는 /preprocess와 동일합니다.
+    """
+    return await _render_stored(
+        request, image_id, mode, normalize_mode, clip_limit, tile_grid_size, canny_t1, canny_t2,
+        edge_format, response_format, if_none_match
+    )
+
+
+@app.post("/images/{image_id}/render")
+async def render_image_post(
+    request: Request,
+    image_id: str,
+    mode: ValidModes = Form("원본만 보기", description="전처리 모드"),
+    normalize_mode: ValidNormalizeModes = Form("minmax", description="정규화 방식"),
+    clip_limit: float = Form(2.0, description="CLAHE clip limit (1.0~5.0)"),
+    tile_grid_size: int = Form(8, description="CLAHE tile size (4~16)"),
+    canny_t1: int = Form(50, description="Canny 하위 임계값"),
+    canny_t2: int = Form(150, description="Canny 상위 임계값"),
+    edge_format: ValidEdgeFormats = Form("png", description="에지 맵 형식 (png, packed: 비트 압축, coords: 좌표 목록)"),
+    response_format: ValidResponseFormats = Form("json", description="응답 형식 (json: Base64, png: PNG 바이너리, binary: 에지 맵 압축 바이트)"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    저장된 이미지 렌더링 API (POST, Form 파라미터)
+
+    응답 형식과 ETag/304 처리는 /preprocess와 동일합니다.
+    """
+    return await _render_stored(
+        request, image_id, mode, normalize_mode, clip_limit, tile_grid_size, canny_t1, canny_t2,
+        edge_format, response_format, if_none_match
+    )
+
+
+@app.delete("/images/{image_id}")
+async def delete_image(image_id: str):
+    """저장된 이미지 삭제 API"""
+    if not image_store.delete(image_id):
+        raise HTTPException(status_code=404, detail=f"이미지를 찾을 수 없습니다: {image_id}")
+    return JSONResponse(content={"status": "success", "image_id": image_id})
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    서비스 메트릭 API
+
+    Returns:
+        - admission: 메모리 예산, 사용 중/최대 예약량, 대기열 길이, 추정치 통계, 수용/거절 횟수
+        - image_store: 저장 항목 수 및 사용 바이트
+    """
+    return JSONResponse(content={
+        "admission": admission.snapshot(),
+        "image_store": {
+            "entries": len(image_store),
+            "total_bytes": image_store.total_bytes,
+            "max_bytes": image_store.max_bytes,
+        },
+    })
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """
+    프로파일링 결과 요약 조회 API (PROFILING_ENABLED=1인 경우에만)
+
+    Returns:
+        - top_functions: 누적 시간 상위 함수
+        - peak_allocations: 최대 메모리 시점의 상위 할당 위치
+        - traced_peak_bytes, elapsed_seconds, profile_path (cProfile 원본 경로)
+    """
+    summary = load_summary(PROFILE_OUTPUT_DIR, profile_id) if PROFILING_ENABLED else None
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"프로파일을 찾을 수 없습니다: {profile_id}")
+    return JSONResponse(content=summary)
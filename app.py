@@ -2,7 +2,7 @@
 import streamlit as st
 from io import BytesIO
 # preprocess_core.py 파일이 같은 폴더에 있어야 합니다.
-from preprocess_core import dicom_to_pil, load_image, apply_clahe, apply_edge
+from preprocess_core import dicom_to_pil, load_image, apply_edge, ClaheEngine
 from PIL import Image
 
 # 1. 페이지 기본 설정
@@ -457,9 +457,15 @@ else:
         st.stop()
 
     # 4.2. 전처리 적용 (DICOM/일반 공통)
+    @st.cache_resource
+    def get_clahe_engine() -> ClaheEngine:
+        """세션 간 공유하는 CLAHE 엔진 (CLAHE 객체 + 그레이스케일 입력 재사용)"""
+        return ClaheEngine()
+
     @st.cache_data
     def apply_preprocess(
-        img: Image.Image,
+        _img: Image.Image,
+        image_key: str,
         mode: str,
         params: dict,
         name: str,
@@ -467,15 +473,24 @@ else:
         norm_mode: str,
         is_dicom_flag: bool
     ):
-        """선택된 모드와 파라미터를 적용하여 이미지 처리"""
+        """
+        선택된 모드와 파라미터를 적용하여 이미지 처리
+
+        _img는 캐시 키 해싱에서 제외하고 (슬라이더 조작마다 전체 픽셀을 해싱하지 않도록)
+        업로드 ID(image_key)와 정규화 방식으로 이미지를 식별합니다.
+        """
         if mode == "Local Contrast(CLAHE)":
-            return apply_clahe(img, params.get('clip_limit', 2.0), params.get('tile_grid_size', 8))
+            return get_clahe_engine().apply_cached(
+                (image_key, norm_mode), _img,
+                params.get('clip_limit', 2.0), params.get('tile_grid_size', 8)
+            )
         elif mode == "Edge Detection (Canny)":
-            return apply_edge(img, threshold1=params.get('threshold1', 50), threshold2=params.get('threshold2', 150))
-        return img
+            return apply_edge(_img, threshold1=params.get('threshold1', 50), threshold2=params.get('threshold2', 150))
+        return _img
 
     processed_img = apply_preprocess(
         original_img,
+        uploaded_file.file_id,
         mode,
         params,
         file_name,
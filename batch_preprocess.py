@@ -0,0 +1,308 @@
+# batch_preprocess.py
+"""
+DICOM 배치 전처리 도구
+
+여러 DICOM 파일에 동일한 전처리를 적용하여 PNG로 저장합니다.
+대상 파일은 디렉터리 전체 또는 dicom_index.py로 만든 SQLite 인덱스 조회 결과로 선택합니다.
+(인덱스를 사용하면 픽셀 데이터를 읽지 않고 Modality/크기/Window 값으로 대상을 고를 수 있습니다)
+
+실행 방법:
+    # 인덱스 조회 결과로 대상 선택
+    python batch_preprocess.py --index dicom_index.sqlite --modality CR --min-rows 2048 \\
+        --output-dir out --mode clahe --normalize-mode window
+
+    # 디렉터리 전체
+    python batch_preprocess.py --input-dir /data/dicom --output-dir out --mode edge
+
+    # 같은 크기의 영상을 64장씩 스택으로 묶어 벡터화 처리
+    python batch_preprocess.py --input-dir /data/dicom --output-dir out --mode clahe --stack-size 64
+
+    # 파일(스택)별 cProfile + tracemalloc 프로파일 저장
+    python batch_preprocess.py --input-dir /data/dicom --output-dir out --mode clahe --profile-dir profiles
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from preprocess_core import (
+    dicom_to_pil, apply_clahe, apply_edge, read_dicom_header, get_window_values,
+    load_dicom_stack, normalize_stack, clahe_stack, edge_stack, gray_stack_to_rgb,
+)
+from profiling import run_profiled
+import dicom_index
+
+BatchMode = Literal["original", "clahe", "edge"]
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    """배치 전처리 파라미터 (프로세스 풀로 전달되므로 pickle 가능해야 함)"""
+    mode: BatchMode = "original"
+    normalize_mode: str = "minmax"
+    clip_limit: float = 2.0
+    tile_grid_size: int = 8
+    canny_t1: int = 50
+    canny_t2: int = 150
+    profile_dir: Optional[str] = None  # 지정 시 파일(스택)별 프로파일 저장
+
+
+def apply_batch_mode(img: Image.Image, options: BatchOptions) -> Image.Image:
+    """BatchOptions에 따라 전처리 적용"""
+    if options.mode == "clahe":
+        return apply_clahe(img, clip_limit=options.clip_limit, tile_grid_size=options.tile_grid_size)
+    elif options.mode == "edge":
+        return apply_edge(img, threshold1=options.canny_t1, threshold2=options.canny_t2)
+    return img
+
+
+def output_path_for(path: str, base_dir: str, output_dir: str) -> str:
+    """입력 파일의 base_dir 기준 상대 경로를 output_dir 아래에 .png로 대응"""
+    relative = os.path.relpath(path, base_dir)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".png")
+
+
+def process_file(path: str, output_path: str, options: BatchOptions) -> Dict[str, Any]:
+    """
+    단일 DICOM 파일 전처리 후 PNG 저장
+
+    예외를 밖으로 던지지 않고 결과 레코드의 status/error로 보고합니다.
+    options.profile_dir이 지정되면 프로파일링하며 실행하고 레코드에 profile_id를 추가합니다.
+
+    Returns:
+        {path, output, status, error, elapsed_ms} 레코드
+    """
+    if options.profile_dir:
+        record, report = run_profiled(
+            os.path.basename(path), options.profile_dir, _process_file, path, output_path, options
+        )
+        record["profile_id"] = report.profile_id
+        return record
+    return _process_file(path, output_path, options)
+
+
+def _process_file(path: str, output_path: str, options: BatchOptions) -> Dict[str, Any]:
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"path": path, "output": output_path, "status": "success", "error": None}
+
+    try:
+        with open(path, "rb") as f:
+            file_bytes = f.read()
+        img, _ = dicom_to_pil(file_bytes, normalize_mode=options.normalize_mode)
+        processed = apply_batch_mode(img, options)
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        processed.save(output_path, format="PNG")
+    except (OSError, ValueError) as e:
+        record.update(status="error", error=str(e))
+
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+    return record
+
+
+def process_stack(pairs: List[Tuple[str, str]], options: BatchOptions) -> List[Dict[str, Any]]:
+    """
+    같은 크기의 DICOM 묶음을 스택으로 한 번에 전처리 후 PNG로 저장
+
+    출력은 파일별 처리(process_file)와 같은 RGB PNG이므로, 스택 사용 여부나
+    파일별 처리로의 전환과 관계없이 한 번의 실행 결과는 같은 형식입니다.
+
+    스택 디코딩에 실패하면(손상 파일, 크기 불일치, 다중 프레임 등) 파일별 처리로 전환하여
+    어떤 파일이 실패했는지 개별 레코드로 보고합니다.
+
+    Args:
+        pairs: (입력 경로, 출력 경로) 목록
+
+    Returns:
+        파일별 결과 레코드 목록 (elapsed_ms는 스택 처리 시간을 장수로 나눈 값)
+    """
+    if options.profile_dir:
+        label = f"stack_{len(pairs)}_{os.path.basename(pairs[0][0])}"
+        records, report = run_profiled(label, options.profile_dir, _process_stack, pairs, options)
+        for record in records:
+            record["profile_id"] = report.profile_id
+        return records
+    return _process_stack(pairs, options)
+
+
+def _process_stack(pairs: List[Tuple[str, str]], options: BatchOptions) -> List[Dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        stack, datasets = load_dicom_stack([path for path, _ in pairs])
+        windows = [get_window_values(dcm) for dcm in datasets]
+        normalized = normalize_stack(
+            stack, options.normalize_mode,
+            window_center=[w[0] for w in windows],
+            window_width=[w[1] for w in windows],
+        )
+    except ValueError:
+        return [_process_file(path, output_path, options) for path, output_path in pairs]
+    del stack
+
+    if options.mode == "clahe":
+        result = clahe_stack(normalized, options.clip_limit, options.tile_grid_size)
+    elif options.mode == "edge":
+        result = edge_stack(normalized, options.canny_t1, options.canny_t2)
+    else:
+        result = normalized
+
+    # RGB 변환 버퍼는 한 장 분량만 할당하여 재사용 (스택 전체를 3채널로 늘리지 않음)
+    rgb = np.empty((1,) + result.shape[1:] + (3,), dtype=np.uint8)
+    records = []
+    for i, (path, output_path) in enumerate(pairs):
+        record: Dict[str, Any] = {"path": path, "output": output_path, "status": "success", "error": None}
+        try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            gray_stack_to_rgb(result[i:i + 1], out=rgb)
+            Image.fromarray(rgb[0]).save(output_path, format="PNG")
+        except OSError as e:
+            record.update(status="error", error=str(e))
+        records.append(record)
+
+    per_image_ms = round((time.perf_counter() - started) * 1000.0 / len(pairs), 2)
+    for record in records:
+        record["elapsed_ms"] = per_image_ms
+    return records
+
+
+def group_into_stacks(pairs: List[Tuple[str, str]], stack_size: int) -> List[List[Tuple[str, str]]]:
+    """헤더의 (Rows, Columns)로 같은 크기끼리 묶고 stack_size 장씩 분할 (단일 프레임만)"""
+    groups: Dict[Any, List[Tuple[str, str]]] = {}
+    for pair in pairs:
+        try:
+            header = read_dicom_header(pair[0], specific_tags=["Rows", "Columns", "NumberOfFrames"])
+            key = (header.get("Rows"), header.get("Columns"))
+            if int(header.get("NumberOfFrames", 1) or 1) > 1:
+                key = None
+        except (OSError, ValueError):
+            key = None  # 헤더를 읽지 못한 파일/다중 프레임은 파일별로 처리
+        groups.setdefault(key, []).append(pair)
+
+    stacks = []
+    for key, members in groups.items():
+        size = 1 if key is None else stack_size
+        stacks.extend(members[i:i + size] for i in range(0, len(members), size))
+    return stacks
+
+
+def _process_pair(pair, options: BatchOptions) -> Dict[str, Any]:
+    return process_file(pair[0], pair[1], options)
+
+
+def select_files(args: argparse.Namespace) -> List[str]:
+    """CLI 인자에 따라 처리 대상 파일 목록 결정"""
+    if args.index:
+        return [record["path"] for record in dicom_index.query_from_args(args.index, args)]
+
+    paths = []
+    for dirpath, _, filenames in os.walk(args.input_dir):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".dcm"):
+                paths.append(os.path.abspath(os.path.join(dirpath, filename)))
+    return sorted(paths)
+
+
+def run_batch(
+    paths: List[str],
+    output_dir: str,
+    options: BatchOptions,
+    workers: int = 1,
+    stack_size: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    파일 목록을 전처리하여 output_dir에 저장
+
+    Args:
+        paths: 입력 DICOM 경로 목록
+        output_dir: 출력 디렉터리 (입력들의 공통 상위 경로 기준 구조 유지)
+        options: 전처리 파라미터
+        workers: 병렬 프로세스 수 (1이면 현재 프로세스에서 순차 처리)
+        stack_size: 2 이상이면 같은 크기 영상을 이 장수씩 스택으로 묶어 벡터화 처리
+
+    Returns:
+        파일별 결과 레코드 목록
+    """
+    if not paths:
+        return []
+
+    base_dir = os.path.commonpath([os.path.dirname(path) for path in paths])
+    pairs = [(path, output_path_for(path, base_dir, output_dir)) for path in paths]
+
+    if stack_size > 1:
+        stacks = group_into_stacks(pairs, stack_size)
+        if workers <= 1:
+            grouped = [process_stack(stack, options) for stack in stacks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                grouped = list(executor.map(partial(process_stack, options=options), stacks))
+        return [record for records in grouped for record in records]
+
+    if workers <= 1:
+        return [process_file(path, output_path, options) for path, output_path in pairs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(_process_pair, options=options), pairs, chunksize=4))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DICOM 배치 전처리")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", help="처리할 DICOM(.dcm) 디렉터리")
+    source.add_argument("--index", help="dicom_index.py SQLite 인덱스 (조회 조건으로 대상 선택)")
+    dicom_index.add_query_arguments(parser.add_argument_group("인덱스 조회 조건 (--index 사용 시)"))
+
+    parser.add_argument("--output-dir", required=True, help="PNG 출력 디렉터리")
+    parser.add_argument("--mode", choices=["original", "clahe", "edge"], default="original")
+    parser.add_argument("--normalize-mode", choices=["minmax", "window"], default="minmax")
+    parser.add_argument("--clip-limit", type=float, default=2.0)
+    parser.add_argument("--tile-grid-size", type=int, default=8)
+    parser.add_argument("--canny-t1", type=int, default=50)
+    parser.add_argument("--canny-t2", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="병렬 프로세스 수")
+    parser.add_argument(
+        "--stack-size", type=int, default=0,
+        help="같은 크기 영상을 N장씩 묶어 벡터화 처리 (0이면 파일별 처리)"
+    )
+    parser.add_argument("--profile-dir", help="파일(스택)별 cProfile + tracemalloc 결과 저장 디렉터리")
+    parser.add_argument("--log", help="파일별 처리 결과를 JSON Lines로 저장할 경로")
+    args = parser.parse_args()
+
+    options = BatchOptions(
+        mode=args.mode,
+        normalize_mode=args.normalize_mode,
+        clip_limit=args.clip_limit,
+        tile_grid_size=args.tile_grid_size,
+        canny_t1=args.canny_t1,
+        canny_t2=args.canny_t2,
+        profile_dir=args.profile_dir,
+    )
+
+    started = time.perf_counter()
+    results = run_batch(
+        select_files(args), args.output_dir, options,
+        workers=args.workers, stack_size=args.stack_size
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.log:
+        with open(args.log, "w", encoding="utf-8") as f:
+            for record in results:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    errors = sum(1 for record in results if record["status"] != "success")
+    print(json.dumps({
+        "total": len(results),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
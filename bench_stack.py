@@ -0,0 +1,124 @@
+# bench_stack.py
+"""
+스택(배치) 처리 vs 단일 이미지 처리 벤치마크
+
+같은 크기의 합성 DICOM N장을 두 경로로 처리하여 이미지당 처리 시간을 비교합니다.
+    - single: dicom_to_pil → apply_clahe / apply_edge (이미지마다 호출, RGB PIL 이미지)
+    - stack:  load_dicom_stack → normalize_stack → clahe_stack / edge_stack
+              → 한 장 분량 버퍼로 RGB 변환 + PIL 이미지 생성 (batch_preprocess --stack-size와 같은 단계)
+
+디코딩(pydicom) 비용을 분리해서 볼 수 있도록 "end_to_end"(디코딩 포함)와
+"post_decode"(디코딩 이후 정규화 + 필터만)를 각각 측정합니다.
+
+실행 방법:
+    python bench_stack.py --count 64 --size 1024 --repeat 3
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+import numpy as np
+from PIL import Image
+
+from preprocess_core import (
+    dicom_to_pil, decode_dicom, normalize_to_pil, get_window_values,
+    apply_clahe, apply_edge,
+    load_dicom_stack, normalize_stack, clahe_stack, edge_stack, gray_stack_to_rgb,
+)
+from synthetic_dicom import make_synthetic_dicom
+
+
+def _best_of(fn: Callable[[], None], repeat: int) -> float:
+    """repeat회 실행 중 최소 소요 시간(초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(count: int, size: int, normalize_mode: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """모드별 single/stack 이미지당 처리 시간(ms)과 속도 향상 비율"""
+    files = [make_synthetic_dicom(size, size, seed=i) for i in range(count)]
+
+    # post_decode 측정용: 미리 디코딩해 둔 배열
+    decoded = [decode_dicom(file_bytes) for file_bytes in files]
+    windows = [get_window_values(dcm) for _, dcm in decoded]
+    stack = np.stack([pixels for pixels, _ in decoded])
+    wc = [w[0] for w in windows]
+    ww = [w[1] for w in windows]
+
+    # 스택 경로 출력 버퍼는 한 번만 할당하여 재사용
+    normalized = np.empty(stack.shape, dtype=np.uint8)
+    filtered = np.empty(stack.shape, dtype=np.uint8)
+    volume = np.empty(stack.shape, dtype=np.float32)
+    rgb = np.empty((1,) + stack.shape[1:] + (3,), dtype=np.uint8)
+
+    def to_rgb_images(result: np.ndarray) -> None:
+        # 단일 경로의 출력(RGB PIL 이미지)과 같은 지점까지 측정
+        for i in range(result.shape[0]):
+            gray_stack_to_rgb(result[i:i + 1], out=rgb)
+            Image.fromarray(rgb[0])
+
+    filters = {
+        "original": (lambda img: img, None),
+        "clahe": (lambda img: apply_clahe(img, 2.0, 8), lambda s: clahe_stack(s, 2.0, 8, out=filtered)),
+        "edge": (lambda img: apply_edge(img, 50, 150), lambda s: edge_stack(s, 50, 150, out=filtered)),
+    }
+
+    results = {}
+    for name, (single_filter, stack_filter) in filters.items():
+
+        def single_end_to_end():
+            for file_bytes in files:
+                img, _ = dicom_to_pil(file_bytes, normalize_mode)
+                single_filter(img)
+
+        def stack_end_to_end():
+            s, datasets = load_dicom_stack(files, out=volume)
+            values = [get_window_values(dcm) for dcm in datasets]
+            u = normalize_stack(s, normalize_mode, [v[0] for v in values], [v[1] for v in values], out=normalized)
+            to_rgb_images(stack_filter(u) if stack_filter else u)
+
+        def single_post_decode():
+            for (pixels, _), (c, w) in zip(decoded, windows):
+                single_filter(normalize_to_pil(pixels, normalize_mode, c, w))
+
+        def stack_post_decode():
+            u = normalize_stack(stack, normalize_mode, wc, ww, out=normalized)
+            to_rgb_images(stack_filter(u) if stack_filter else u)
+
+        row = {}
+        for stage, single_fn, stack_fn in (
+            ("end_to_end", single_end_to_end, stack_end_to_end),
+            ("post_decode", single_post_decode, stack_post_decode),
+        ):
+            single_ms = _best_of(single_fn, repeat) / count * 1000.0
+            stack_ms = _best_of(stack_fn, repeat) / count * 1000.0
+            row[f"{stage}_single_ms"] = round(single_ms, 3)
+            row[f"{stage}_stack_ms"] = round(stack_ms, 3)
+            row[f"{stage}_speedup"] = round(single_ms / stack_ms, 2) if stack_ms > 0 else None
+        results[name] = row
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="스택 처리 vs 단일 이미지 처리 벤치마크")
+    parser.add_argument("--count", type=int, default=32, help="이미지 수 (N)")
+    parser.add_argument("--size", type=int, default=512, help="이미지 한 변 크기")
+    parser.add_argument("--normalize-mode", choices=["minmax", "window"], default="window")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최소값 사용)")
+    args = parser.parse_args()
+
+    report = {
+        "config": vars(args),
+        "per_image": run_benchmark(args.count, args.size, args.normalize_mode, args.repeat),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# dicom_index.py
+"""
+DICOM 헤더 인덱서 (SQLite)
+
+디렉터리 트리의 DICOM 파일 헤더만 병렬로 읽어 로컬 SQLite 인덱스에 저장합니다.
+전처리 실행 전에 Modality, View Position, 이미지 크기, Window 값 등으로
+픽셀 데이터 디코딩 없이 대상 파일을 선택할 수 있습니다.
+
+특징:
+    - 헤더 전용 로딩 (preprocess_core.read_dicom_header, PixelData 미로딩)
+    - 프로세스 풀 기반 병렬 스캔
+    - 증분 업데이트: (mtime, size)가 바뀐 파일만 다시 읽고, 삭제된 파일은 인덱스에서 제거
+
+실행 방법:
+    python dicom_index.py scan /data/dicom --db dicom_index.sqlite
+    python dicom_index.py query --db dicom_index.sqlite --modality CR --min-rows 2048
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from preprocess_core import read_dicom_header, get_window_values
+
+# 인덱싱 대상 태그 (헤더에서 이 태그들만 파싱)
+INDEX_TAGS = [
+    "SOPInstanceUID", "PatientID", "Modality", "ViewPosition",
+    "Rows", "Columns", "BitsStored", "WindowCenter", "WindowWidth",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dicom_index (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    is_valid INTEGER NOT NULL,
+    sop_instance_uid TEXT,
+    patient_id TEXT,
+    modality TEXT,
+    view_position TEXT,
+    rows INTEGER,
+    columns INTEGER,
+    bits_stored INTEGER,
+    window_center REAL,
+    window_width REAL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dicom_modality ON dicom_index (modality, view_position);
+"""
+
+COLUMNS = [
+    "path", "mtime", "size", "is_valid", "sop_instance_uid", "patient_id",
+    "modality", "view_position", "rows", "columns", "bits_stored",
+    "window_center", "window_width", "indexed_at",
+]
+
+
+@dataclass
+class ScanStats:
+    """스캔 결과 통계"""
+    scanned: int = 0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    invalid: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """인덱스 DB 연결 (스키마가 없으면 생성)"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None  # 형식이 잘못된 값은 NULL로 색인
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return str(value) if value not in (None, "") else None
+
+
+def read_header_record(path: str) -> Optional[Dict[str, Any]]:
+    """
+    단일 파일의 헤더를 읽어 인덱스 레코드 생성
+
+    DICOM이 아니거나 헤더 파싱에 실패한 파일은 is_valid=0 레코드로 반환하여
+    재스캔 시 다시 읽지 않도록 합니다. 헤더는 읽었지만 개별 태그 값(WindowCenter 등)의
+    형식이 잘못된 경우에는 유효한 레코드로 두고 해당 컬럼만 NULL로 색인합니다.
+    디렉터리 탐색 이후 삭제/이름 변경된 파일(게이트웨이 임시 파일 등)은 None을 반환합니다.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    record: Dict[str, Any] = {column: None for column in COLUMNS}
+    record.update(path=path, mtime=stat.st_mtime, size=stat.st_size, is_valid=0, indexed_at=time.time())
+
+    try:
+        dcm = read_dicom_header(path, specific_tags=INDEX_TAGS)
+    except ValueError:
+        # read_dicom_header는 모든 예외를 ValueError로 바꾸므로 파일이 아직 있는지 다시 확인
+        if not os.path.isfile(path):
+            return None  # 읽는 도중 삭제/이동된 파일
+        return record
+
+    wc, ww = get_window_values(dcm)  # 해석할 수 없는 값은 (None, None)
+    record.update(
+        is_valid=1,
+        sop_instance_uid=_optional_str(dcm.get("SOPInstanceUID")),
+        patient_id=_optional_str(dcm.get("PatientID")),
+        modality=_optional_str(dcm.get("Modality")),
+        view_position=_optional_str(dcm.get("ViewPosition")),
+        rows=_optional_int(dcm.get("Rows")),
+        columns=_optional_int(dcm.get("Columns")),
+        bits_stored=_optional_int(dcm.get("BitsStored")),
+        window_center=wc,
+        window_width=ww,
+    )
+    return record
+
+
+def _walk_files(root: str) -> Iterator[Tuple[str, float, int]]:
+    """디렉터리 트리의 (절대경로, mtime, size) 목록"""
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.abspath(os.path.join(dirpath, filename))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_mtime, stat.st_size
+
+
+def scan_directory(db_path: str, root: str, workers: Optional[int] = None) -> ScanStats:
+    """
+    디렉터리 트리를 스캔하여 인덱스를 증분 업데이트
+
+    Args:
+        db_path: SQLite 인덱스 파일 경로
+        root: 스캔할 디렉터리
+        workers: 헤더 파싱 프로세스 수 (None이면 CPU 코어 수)
+
+    Returns:
+        ScanStats 스캔 통계
+    """
+    started = time.perf_counter()
+    stats = ScanStats()
+    root = os.path.abspath(root)
+    conn = connect(db_path)
+
+    try:
+        # 기존 인덱스에서 root 하위 항목의 (mtime, size) 조회
+        prefix = root.rstrip(os.sep) + os.sep
+        known = {
+            row["path"]: (row["mtime"], row["size"])
+            for row in conn.execute(
+                "SELECT path, mtime, size FROM dicom_index WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+
+        # 변경/신규 파일만 선별
+        pending: List[str] = []
+        seen = set()
+        for path, mtime, size in _walk_files(root):
+            stats.scanned += 1
+            seen.add(path)
+            if known.get(path) == (mtime, size):
+                stats.unchanged += 1
+            else:
+                pending.append(path)
+
+        # 헤더 병렬 파싱
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(read_header_record, pending, chunksize=32))
+
+            # 탐색 이후 사라진 파일은 건너뛰고, 이전에 인덱스된 파일이면 아래에서 제거
+            records = [record for record in results if record is not None]
+            for path, record in zip(pending, results):
+                if record is None:
+                    seen.discard(path)
+
+            placeholders = ", ".join("?" for _ in COLUMNS)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO dicom_index ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(record[column] for column in COLUMNS) for record in records],
+            )
+            for record in records:
+                if record["path"] in known:
+                    stats.updated += 1
+                else:
+                    stats.added += 1
+                if not record["is_valid"]:
+                    stats.invalid += 1
+
+        # 디스크에서 사라진 파일 제거
+        removed = [(path,) for path in known if path not in seen]
+        conn.executemany("DELETE FROM dicom_index WHERE path = ?", removed)
+        stats.removed = len(removed)
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def query_index(
+    db_path: str,
+    modality: Optional[str] = None,
+    view_position: Optional[str] = None,
+    patient_id: Optional[str] = None,
+    bits_stored: Optional[int] = None,
+    min_rows: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    min_columns: Optional[int] = None,
+    max_columns: Optional[int] = None,
+    has_window: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """
+    조건에 맞는 DICOM 레코드 조회 (유효한 DICOM만, 경로순 정렬)
+
+    None인 조건은 무시됩니다.
+
+    Returns:
+        인덱스 레코드(dict) 목록
+    """
+    clauses = ["is_valid = 1"]
+    params: List[Any] = []
+
+    for column, value in (
+        ("modality", modality),
+        ("view_position", view_position),
+        ("patient_id", patient_id),
+        ("bits_stored", bits_stored),
+    ):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    for column, op, value in (
+        ("rows", ">=", min_rows),
+        ("rows", "<=", max_rows),
+        ("columns", ">=", min_columns),
+        ("columns", "<=", max_columns),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+
+    if has_window is not None:
+        clauses.append("window_width IS NOT NULL" if has_window else "window_width IS NULL")
+
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM dicom_index WHERE {' AND '.join(clauses)} ORDER BY path",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    """query_index 조건을 CLI 인자로 등록 (배치 도구와 공유)"""
+    parser.add_argument("--modality", help="Modality (예: CR, DX, CT)")
+    parser.add_argument("--view-position", help="View Position (예: PA, AP, LAT)")
+    parser.add_argument("--patient-id", help="Patient ID")
+    parser.add_argument("--bits-stored", type=int, help="Bits Stored")
+    parser.add_argument("--min-rows", type=int)
+    parser.add_argument("--max-rows", type=int)
+    parser.add_argument("--min-columns", type=int)
+    parser.add_argument("--max-columns", type=int)
+    parser.add_argument(
+        "--has-window", action=argparse.BooleanOptionalAction, default=None,
+        help="Window Center/Width 유무로 필터"
+    )
+
+
+def query_from_args(db_path: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """add_query_arguments로 등록한 인자로 query_index 실행"""
+    return query_index(
+        db_path,
+        modality=args.modality,
+        view_position=args.view_position,
+        patient_id=args.patient_id,
+        bits_stored=args.bits_stored,
+        min_rows=args.min_rows,
+        max_rows=args.max_rows,
+        min_columns=args.min_columns,
+        max_columns=args.max_columns,
+        has_window=args.has_window,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DICOM 헤더 인덱서 (SQLite)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="디렉터리 스캔 및 인덱스 증분 업데이트")
+    scan_parser.add_argument("root", help="스캔할 디렉터리")
+    scan_parser.add_argument("--db", default="dicom_index.sqlite", help="인덱스 파일 경로")
+    scan_parser.add_argument("--workers", type=int, default=None, help="병렬 프로세스 수")
+
+    query_parser = subparsers.add_parser("query", help="조건에 맞는 파일 조회")
+    query_parser.add_argument("--db", default="dicom_index.sqlite", help="인덱스 파일 경로")
+    query_parser.add_argument("--json", action="store_true", help="레코드 전체를 JSON Lines로 출력")
+    add_query_arguments(query_parser)
+
+    args = parser.parse_args()
+
+    if args.command == "scan":
+        stats = scan_directory(args.db, args.root, workers=args.workers)
+        print(json.dumps(asdict(stats), ensure_ascii=False))
+    else:
+        for record in query_from_args(args.db, args):
+            print(json.dumps(record, ensure_ascii=False) if args.json else record["path"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+# dicom_series.py
+"""
+CT/MR 다중 파일 시리즈 → 3D 볼륨 로더
+
+슬라이스마다 파일이 하나씩인 CT/MR 검사를 SeriesInstanceUID로 묶고,
+ImagePositionPatient 기준으로 정렬한 뒤 미리 할당한 (Z, H, W) float32 볼륨에 병렬로 디코딩합니다.
+Rescale은 볼륨 전체에 한 번만 적용하고, Window/CLAHE/Canny는 슬라이스 범위를 나눠 여러 코어에서 처리합니다.
+
+처리 흐름:
+    1. 헤더만 병렬로 읽어 SeriesInstanceUID별로 그룹화 (preprocess_core.read_dicom_header)
+    2. 슬라이스 법선(ImageOrientationPatient) 방향으로 ImagePositionPatient를 투영하여 정렬
+    3. 볼륨 할당 후 슬라이스별 디코딩을 스레드 풀에서 병렬 수행 (각 슬라이스는 볼륨에 직접 복사)
+    4. rescale_stack으로 RescaleSlope/Intercept 일괄 적용
+    5. 볼륨 공통 Window(또는 Min/Max) 정규화와 CLAHE/Canny를 슬라이스 범위별로 병렬 처리
+
+실행 방법:
+    python dicom_series.py /data/ct_study --output-dir out --mode clahe --normalize-mode window
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pydicom
+from pydicom.multival import MultiValue
+
+from preprocess_core import (
+    read_dicom_header, get_window_values,
+    rescale_stack, normalize_stack, clahe_stack, edge_stack,
+)
+
+# 그룹화/정렬에 필요한 헤더 태그
+SERIES_TAGS = [
+    "SeriesInstanceUID", "SeriesDescription", "Modality", "InstanceNumber",
+    "ImagePositionPatient", "ImageOrientationPatient", "PixelSpacing",
+    "Rows", "Columns", "NumberOfFrames",
+    "RescaleSlope", "RescaleIntercept", "WindowCenter", "WindowWidth",
+]
+
+
+@dataclass
+class SliceHeader:
+    """정렬/볼륨 할당에 필요한 슬라이스 헤더 정보"""
+    path: str
+    series_uid: str
+    rows: int
+    columns: int
+    instance_number: Optional[int]
+    position: Optional[np.ndarray]
+    orientation: Optional[np.ndarray]
+    slope: float
+    intercept: float
+    window_center: Optional[float]
+    window_width: Optional[float]
+    pixel_spacing: Optional[Tuple[float, float]]
+    modality: Optional[str] = None
+    description: Optional[str] = None
+
+
+@dataclass
+class SeriesVolume:
+    """
+    로딩된 3D 볼륨
+
+    Attributes:
+        series_uid: SeriesInstanceUID
+        volume: Rescale이 적용된 (Z, H, W) float32 볼륨
+        slices: 볼륨 순서대로 정렬된 슬라이스 헤더
+        spacing: (slice, row, column) 방향 간격 (mm, 알 수 없으면 None)
+    """
+    series_uid: str
+    volume: np.ndarray
+    slices: List[SliceHeader] = field(default_factory=list)
+    spacing: Tuple[Optional[float], Optional[float], Optional[float]] = (None, None, None)
+
+    @property
+    def window(self) -> Tuple[Optional[float], Optional[float]]:
+        """시리즈 공통 Window (첫 번째로 유효한 슬라이스 값)"""
+        for header in self.slices:
+            if header.window_center is not None and header.window_width is not None:
+                return header.window_center, header.window_width
+        return None, None
+
+
+def _float_list(value) -> Optional[np.ndarray]:
+    """다중값 태그를 float 배열로 변환 (없거나 해석할 수 없으면 None)"""
+    if value is None:
+        return None
+    if not isinstance(value, (list, tuple, MultiValue)):
+        value = [value]
+    try:
+        values = np.array([float(v) for v in value], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return values if values.size and np.isfinite(values).all() else None
+
+
+def _optional_int(value) -> Optional[int]:
+    """정수 태그 변환 (없거나 해석할 수 없으면 None)"""
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_slice_header(path: str) -> Optional[SliceHeader]:
+    """
+    단일 파일의 슬라이스 헤더 읽기
+
+    DICOM이 아니거나, SeriesInstanceUID가 없거나, 다중 프레임이거나,
+    크기/Rescale 값을 해석할 수 없는 파일은 None (스터디 전체 그룹화를 막지 않도록 해당 슬라이스만 제외)
+    InstanceNumber, 위치/방향, PixelSpacing, Window 값은 해석할 수 없으면 None으로 두고 사용합니다.
+    """
+    try:
+        dcm = read_dicom_header(path, specific_tags=SERIES_TAGS)
+    except (OSError, ValueError):
+        return None
+
+    series_uid = dcm.get("SeriesInstanceUID")
+    if not series_uid or "Rows" not in dcm or "Columns" not in dcm:
+        return None
+    try:
+        if int(dcm.get("NumberOfFrames", 1) or 1) > 1:
+            return None
+        rows, columns = int(dcm.Rows), int(dcm.Columns)
+        slope = float(dcm.get("RescaleSlope", 1.0) or 1.0)
+        intercept = float(dcm.get("RescaleIntercept", 0.0) or 0.0)
+    except (TypeError, ValueError):
+        return None
+
+    wc, ww = get_window_values(dcm)
+    spacing = _float_list(dcm.get("PixelSpacing"))
+    return SliceHeader(
+        path=path,
+        series_uid=str(series_uid),
+        rows=rows,
+        columns=columns,
+        instance_number=_optional_int(dcm.get("InstanceNumber")),
+        position=_float_list(dcm.get("ImagePositionPatient")),
+        orientation=_float_list(dcm.get("ImageOrientationPatient")),
+        slope=slope,
+        intercept=intercept,
+        window_center=wc,
+        window_width=ww,
+        pixel_spacing=(float(spacing[0]), float(spacing[1])) if spacing is not None and spacing.size >= 2 else None,
+        modality=dcm.get("Modality"),
+        description=dcm.get("SeriesDescription"),
+    )
+
+
+def group_series(paths: List[str], workers: Optional[int] = None) -> Dict[str, List[SliceHeader]]:
+    """
+    파일 목록의 헤더를 병렬로 읽어 SeriesInstanceUID별로 그룹화 (각 그룹은 정렬됨)
+
+    Returns:
+        {SeriesInstanceUID: 정렬된 SliceHeader 목록}
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        headers = [header for header in executor.map(read_slice_header, paths) if header is not None]
+
+    groups: Dict[str, List[SliceHeader]] = {}
+    for header in headers:
+        groups.setdefault(header.series_uid, []).append(header)
+    return {uid: sort_slices(members) for uid, members in groups.items()}
+
+
+def _slice_normal(headers: List[SliceHeader]) -> Optional[np.ndarray]:
+    for header in headers:
+        if header.orientation is not None and header.orientation.shape == (6,):
+            return np.cross(header.orientation[:3], header.orientation[3:])
+    return None
+
+
+def sort_slices(headers: List[SliceHeader]) -> List[SliceHeader]:
+    """
+    슬라이스 정렬
+
+    ImagePositionPatient를 슬라이스 법선(ImageOrientationPatient 행/열 방향의 외적)에
+    투영한 값으로 정렬하고, 위치 정보가 없으면 InstanceNumber, 그것도 없으면 경로 순으로 정렬합니다.
+    """
+    normal = _slice_normal(headers)
+    if normal is not None and all(h.position is not None and h.position.shape == (3,) for h in headers):
+        return sorted(headers, key=lambda h: float(np.dot(h.position, normal)))
+    if all(h.instance_number is not None for h in headers):
+        return sorted(headers, key=lambda h: h.instance_number)
+    return sorted(headers, key=lambda h: h.path)
+
+
+def _slice_spacing(headers: List[SliceHeader]) -> Optional[float]:
+    normal = _slice_normal(headers)
+    if normal is None or len(headers) < 2 or any(h.position is None or h.position.shape != (3,) for h in headers):
+        return None
+    positions = np.array([np.dot(h.position, normal) for h in headers])
+    return float(np.median(np.diff(positions)))
+
+
+def _chunk_ranges(n: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, n))
+    bounds = np.linspace(0, n, parts + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _run_chunked(fn: Callable[[int, int], None], n: int, workers: int) -> None:
+    """[0, n) 슬라이스 범위를 workers개로 나눠 스레드 풀에서 fn(start, end) 실행"""
+    ranges = _chunk_ranges(n, workers)
+    if len(ranges) == 1:
+        fn(*ranges[0])
+        return
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        for future in [executor.submit(fn, start, end) for start, end in ranges]:
+            future.result()
+
+
+def load_series_volume(
+    headers: List[SliceHeader],
+    workers: Optional[int] = None,
+    out: Optional[np.ndarray] = None
+) -> SeriesVolume:
+    """
+    정렬된 슬라이스 헤더 목록으로 3D 볼륨 로딩
+
+    볼륨을 한 번 할당하고 각 슬라이스를 스레드 풀에서 디코딩하여 제자리에 복사한 뒤,
+    RescaleSlope/Intercept를 볼륨 전체에 한 번에 적용합니다.
+
+    Args:
+        headers: sort_slices로 정렬된 같은 시리즈의 SliceHeader 목록
+        workers: 디코딩 스레드 수 (None이면 CPU 코어 수)
+        out: 결과를 기록할 (Z, H, W) float32 배열 (None이면 새로 할당)
+
+    Raises:
+        ValueError: 슬라이스 크기가 서로 다르거나 디코딩에 실패한 경우
+    """
+    if not headers:
+        raise ValueError("로딩할 슬라이스가 없습니다")
+
+    shape = (len(headers), headers[0].rows, headers[0].columns)
+    if any((h.rows, h.columns) != shape[1:] for h in headers):
+        raise ValueError(f"시리즈 내 슬라이스 크기가 서로 다릅니다: {headers[0].series_uid}")
+    if out is None:
+        out = np.empty(shape, dtype=np.float32)
+
+    def decode_into(index: int) -> None:
+        try:
+            pixels = pydicom.dcmread(headers[index].path).pixel_array
+        except Exception as e:
+            raise ValueError(f"DICOM 파일 처리 실패 ({headers[index].path}): {e}")
+        if pixels.shape != shape[1:]:
+            raise ValueError(f"슬라이스 크기가 헤더와 다릅니다 ({headers[index].path}: {pixels.shape})")
+        np.copyto(out[index], pixels, casting="unsafe")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(decode_into, range(len(headers))))
+
+    # 슬라이스별 slope/intercept를 브로드캐스트하여 볼륨 전체에 한 번에 적용
+    rescale_stack(
+        out,
+        np.array([h.slope for h in headers], dtype=np.float32),
+        np.array([h.intercept for h in headers], dtype=np.float32),
+        out=out,
+    )
+
+    row_spacing, column_spacing = headers[0].pixel_spacing or (None, None)
+    return SeriesVolume(
+        series_uid=headers[0].series_uid,
+        volume=out,
+        slices=headers,
+        spacing=(_slice_spacing(headers), row_spacing, column_spacing),
+    )
+
+
+def process_volume(
+    series: SeriesVolume,
+    normalize_mode: str = "window",
+    mode: str = "original",
+    clip_limit: float = 2.0,
+    tile_grid_size: int = 8,
+    canny_t1: int = 50,
+    canny_t2: int = 150,
+    workers: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    chunk_slices: int = 8
+) -> np.ndarray:
+    """
+    볼륨 정규화 + 슬라이스별 CLAHE/Canny를 여러 코어에서 병렬 처리
+
+    정규화는 볼륨 공통 기준을 사용합니다 (window: 시리즈 Window, minmax: 볼륨 전체 최소/최대).
+    슬라이스 범위별로 나눠 처리하므로 결과는 단일 스레드 처리와 같습니다.
+    CLAHE/Canny는 스레드마다 chunk_slices장 분량의 정규화 버퍼만 두고 out에 직접 기록하므로,
+    출력 볼륨 외에 볼륨 크기의 추가 버퍼를 할당하지 않습니다.
+
+    Args:
+        series: load_series_volume 결과
+        mode: "original", "clahe", "edge"
+        workers: 처리 스레드 수 (None이면 CPU 코어 수)
+        out: 결과를 기록할 (Z, H, W) uint8 배열 (None이면 새로 할당)
+        chunk_slices: CLAHE/Canny 전 정규화 버퍼의 슬라이스 수
+
+    Returns:
+        (Z, H, W) uint8 볼륨
+    """
+    volume = series.volume
+    workers = workers or os.cpu_count() or 1
+    if out is None:
+        out = np.empty(volume.shape, dtype=np.uint8)
+
+    wc, ww = series.window
+    # 볼륨 전체 최소/최대는 Min/Max 정규화(또는 Window가 없어 fallback)할 때만 계산
+    uses_minmax = normalize_mode == "minmax" or wc is None or ww is None or ww <= 0
+    value_range = (float(volume.min()), float(volume.max())) if uses_minmax else None
+
+    def normalize(start: int, end: int, dst: np.ndarray) -> np.ndarray:
+        return normalize_stack(
+            volume[start:end], normalize_mode,
+            window_center=wc, window_width=ww,
+            value_range=value_range, out=dst,
+        )
+
+    if mode == "clahe":
+        apply_filter = lambda src, dst: clahe_stack(src, clip_limit, tile_grid_size, out=dst)
+    elif mode == "edge":
+        apply_filter = lambda src, dst: edge_stack(src, canny_t1, canny_t2, out=dst)
+    else:
+        apply_filter = None
+
+    def process_range(start: int, end: int) -> None:
+        if apply_filter is None:
+            normalize(start, end, out[start:end])
+            return
+        # 정규화 결과는 스레드별 작은 버퍼에 두고 필터 결과만 out에 기록
+        buffer = np.empty((min(chunk_slices, end - start),) + volume.shape[1:], dtype=np.uint8)
+        for chunk_start in range(start, end, buffer.shape[0]):
+            chunk_end = min(chunk_start + buffer.shape[0], end)
+            normalized = normalize(chunk_start, chunk_end, buffer[:chunk_end - chunk_start])
+            apply_filter(normalized, out[chunk_start:chunk_end])
+
+    _run_chunked(process_range, volume.shape[0], workers)
+    return out
+
+
+def find_dicom_files(root: str) -> List[str]:
+    """디렉터리 트리의 모든 파일 경로 (확장자 없는 DICOM도 포함, 헤더 읽기에서 걸러짐)"""
+    return sorted(
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(root)
+        for filename in filenames
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CT/MR 시리즈 → 3D 볼륨 로딩 및 전처리")
+    parser.add_argument("input_dir", help="검사(시리즈) 파일이 있는 디렉터리")
+    parser.add_argument("--output-dir", required=True, help="볼륨(.npy)과 메타데이터(.json) 출력 디렉터리")
+    parser.add_argument("--mode", choices=["original", "clahe", "edge"], default="original")
+    parser.add_argument("--normalize-mode", choices=["minmax", "window"], default="window")
+    parser.add_argument("--clip-limit", type=float, default=2.0)
+    parser.add_argument("--tile-grid-size", type=int, default=8)
+    parser.add_argument("--canny-t1", type=int, default=50)
+    parser.add_argument("--canny-t2", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="병렬 스레드 수")
+    parser.add_argument("--min-slices", type=int, default=2, help="이 수보다 슬라이스가 적은 시리즈는 건너뜀")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    groups = group_series(find_dicom_files(args.input_dir), workers=args.workers)
+
+    for series_uid, headers in groups.items():
+        if len(headers) < args.min_slices:
+            continue
+        try:
+            series = load_series_volume(headers, workers=args.workers)
+        except ValueError as e:
+            print(json.dumps({"series_uid": series_uid, "status": "error", "error": str(e)}, ensure_ascii=False))
+            continue
+
+        processed = process_volume(
+            series,
+            normalize_mode=args.normalize_mode,
+            mode=args.mode,
+            clip_limit=args.clip_limit,
+            tile_grid_size=args.tile_grid_size,
+            canny_t1=args.canny_t1,
+            canny_t2=args.canny_t2,
+            workers=args.workers,
+        )
+
+        np.save(os.path.join(args.output_dir, f"{series_uid}.npy"), processed)
+        summary = {
+            "series_uid": series_uid,
+            "status": "success",
+            "modality": headers[0].modality,
+            "description": headers[0].description,
+            "shape": list(processed.shape),
+            "spacing": list(series.spacing),
+            "window": list(series.window),
+            "slices": [h.path for h in headers],
+        }
+        with open(os.path.join(args.output_dir, f"{series_uid}.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(json.dumps({k: summary[k] for k in ("series_uid", "status", "shape")}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# edge_codec.py
+"""
+Canny 에지 맵 압축 인코딩/디코딩
+
+에지 맵은 픽셀당 1비트 정보이므로 RGB PNG 대신 아래 형식으로 전송할 수 있습니다.
+NumPy와 표준 라이브러리만 사용하므로 API 클라이언트에서도 그대로 가져다 디코딩할 수 있습니다.
+
+형식 (edge_format):
+    - "packed": np.packbits로 8픽셀을 1바이트로 묶은 뒤 zlib 압축 (행 우선, MSB 먼저)
+    - "coords": 에지 픽셀의 (row, col) 좌표 목록을 리틀 엔디언 정수로 나열 후 zlib 압축
+                (에지가 드문 영상에서 가장 작음, 크기가 65535 이하이면 uint16, 아니면 uint32)
+
+클라이언트 사용 예:
+    from edge_codec import decode_edge_payload
+    mask = decode_edge_payload(response.json()["edge_data"])  # (H, W) uint8, 에지 = 255
+"""
+import base64
+import zlib
+from typing import Any, Dict, Literal, Sequence, Tuple
+
+import numpy as np
+
+EdgeFormat = Literal["packed", "coords"]
+
+_ZLIB_LEVEL = 6
+
+
+def _coord_dtype(shape: Sequence[int]) -> np.dtype:
+    return np.dtype("<u2") if max(shape) <= 0xFFFF else np.dtype("<u4")
+
+
+def pack_edge_mask(mask: np.ndarray) -> bytes:
+    """(H, W) 에지 맵(0 이외 = 에지)을 비트 단위로 묶어 zlib 압축"""
+    return zlib.compress(np.packbits(mask != 0).tobytes(), _ZLIB_LEVEL)
+
+
+def unpack_edge_mask(data: bytes, shape: Sequence[int]) -> np.ndarray:
+    """pack_edge_mask 결과를 (H, W) uint8 에지 맵(에지 = 255)으로 복원"""
+    rows, columns = int(shape[0]), int(shape[1])
+    bits = np.unpackbits(np.frombuffer(zlib.decompress(data), dtype=np.uint8), count=rows * columns)
+    return (bits * np.uint8(255)).reshape(rows, columns)
+
+
+def encode_edge_coords(mask: np.ndarray) -> bytes:
+    """에지 픽셀 좌표를 행 우선 순서의 (row, col) 정수 쌍으로 나열하여 zlib 압축"""
+    rows, columns = np.nonzero(mask)
+    coords = np.empty((rows.size, 2), dtype=_coord_dtype(mask.shape))
+    coords[:, 0] = rows
+    coords[:, 1] = columns
+    return zlib.compress(coords.tobytes(), _ZLIB_LEVEL)
+
+
+def decode_edge_coords(data: bytes, shape: Sequence[int]) -> np.ndarray:
+    """encode_edge_coords 결과를 (H, W) uint8 에지 맵(에지 = 255)으로 복원"""
+    coords = np.frombuffer(zlib.decompress(data), dtype=_coord_dtype(shape)).reshape(-1, 2)
+    mask = np.zeros((int(shape[0]), int(shape[1])), dtype=np.uint8)
+    mask[coords[:, 0], coords[:, 1]] = 255
+    return mask
+
+
+def encode_edge_map(mask: np.ndarray, edge_format: EdgeFormat) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    에지 맵을 지정한 형식으로 인코딩
+
+    Returns:
+        (인코딩된 바이트, 디코딩에 필요한 정보 {format, shape, edge_pixels})
+    """
+    if edge_format == "packed":
+        data = pack_edge_mask(mask)
+    elif edge_format == "coords":
+        data = encode_edge_coords(mask)
+    else:
+        raise ValueError(f"지원하지 않는 에지 형식: {edge_format}")
+
+    info = {
+        "format": edge_format,
+        "shape": [int(mask.shape[0]), int(mask.shape[1])],
+        "edge_pixels": int(np.count_nonzero(mask)),
+    }
+    return data, info
+
+
+def decode_edge_map(data: bytes, edge_format: EdgeFormat, shape: Sequence[int]) -> np.ndarray:
+    """encode_edge_map 결과를 (H, W) uint8 에지 맵(에지 = 255)으로 복원"""
+    if edge_format == "packed":
+        return unpack_edge_mask(data, shape)
+    elif edge_format == "coords":
+        return decode_edge_coords(data, shape)
+    raise ValueError(f"지원하지 않는 에지 형식: {edge_format}")
+
+
+def decode_edge_payload(payload: Dict[str, Any]) -> np.ndarray:
+    """
+    /preprocess JSON 응답의 edge_data 항목을 에지 맵으로 복원 (클라이언트용)
+
+    Args:
+        payload: {format, shape, base64_string, ...}
+    """
+    data = base64.b64decode(payload["base64_string"])
+    return decode_edge_map(data, payload["format"], payload["shape"])
+
+
+def decode_edge_response(content: bytes, headers: Dict[str, str]) -> np.ndarray:
+    """
+    /preprocess 바이너리 응답(response_format=binary)을 에지 맵으로 복원 (클라이언트용)
+
+    Args:
+        content: 응답 본문
+        headers: 응답 헤더 (X-Edge-Format, X-Edge-Shape: "H,W")
+    """
+    lowered = {key.lower(): value for key, value in headers.items()}
+    shape = [int(v) for v in lowered["x-edge-shape"].split(",")]
+    return decode_edge_map(content, lowered["x-edge-format"], shape)
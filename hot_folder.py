@@ -0,0 +1,285 @@
+# hot_folder.py
+"""
+핫 폴더 수집 서비스
+
+모달리티 게이트웨이가 공유 디렉터리에 내려놓는 DICOM을 watchdog 파일 시스템 이벤트로 감지하여
+자동으로 전처리하고 PNG와 처리 로그(JSON Lines)를 남깁니다.
+
+동작 방식:
+    - 생성/수정/이동 이벤트가 오면 해당 파일의 대기 시간을 갱신 (디바운스)
+    - 마지막 이벤트 이후 settle_seconds 동안 크기가 변하지 않거나
+      쓰기 종료(close) 이벤트가 오면 처리 대상으로 확정
+    - 확정된 파일은 프로세스 풀(workers)에서 batch_preprocess.process_file로 처리,
+      동시에 처리 중인 파일 수는 max_in_flight로 제한 (초과 시 대기)
+    - 디렉터리를 주기적으로 훑지 않고, 대기 중인 파일의 타이머만 관리
+    - 워커 프로세스가 비정상 종료(OOM 등)되어 풀이 망가지면 새 풀로 교체하고 계속 수집
+
+실행 방법:
+    python hot_folder.py /data/incoming --output-dir /data/processed --mode clahe --normalize-mode window
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from batch_preprocess import BatchOptions, output_path_for, process_file
+
+
+class _IngestEventHandler(FileSystemEventHandler):
+    """watchdog 이벤트를 HotFolderService로 전달"""
+
+    def __init__(self, service: "HotFolderService"):
+        self.service = service
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        if not event.is_directory:
+            self.service.notify(event.src_path)
+
+    def on_modified(self, event: FileSystemEvent) -> None:
+        if not event.is_directory:
+            self.service.notify(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        # 임시 이름으로 쓴 뒤 최종 이름으로 바꾸는 게이트웨이 대응
+        if not event.is_directory:
+            self.service.notify(event.dest_path, closed=True)
+
+    def on_closed(self, event: FileSystemEvent) -> None:
+        # 쓰기 종료 이벤트 (inotify 지원 플랫폼)
+        if not event.is_directory:
+            self.service.notify(event.src_path, closed=True)
+
+
+class HotFolderService:
+    """
+    핫 폴더 감시 + 디바운스 + 제한된 동시 처리
+
+    Args:
+        input_dir: 감시할 디렉터리 (하위 디렉터리 포함)
+        output_dir: PNG 출력 디렉터리 (input_dir 기준 구조 유지)
+        options: 전처리 파라미터
+        workers: 처리 프로세스 수
+        max_in_flight: 동시에 제출되어 처리 중인 최대 파일 수
+        settle_seconds: 마지막 이벤트 이후 크기 변화가 없으면 완료로 판단하는 시간(초)
+        suffix: 처리할 파일 확장자 (빈 문자열이면 모든 파일)
+        log_path: 처리 로그(JSON Lines) 경로
+        max_remembered: 중복 이벤트 무시용으로 기억할 처리 완료 파일 수
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        options: BatchOptions,
+        workers: int = 2,
+        max_in_flight: Optional[int] = None,
+        settle_seconds: float = 2.0,
+        suffix: str = ".dcm",
+        log_path: Optional[str] = None,
+        max_remembered: int = 10000,
+    ):
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_dir = output_dir
+        self.options = options
+        self.settle_seconds = settle_seconds
+        self.suffix = suffix.lower()
+        self.log_path = log_path or os.path.join(output_dir, "processing_log.jsonl")
+        self.workers = workers
+        self.max_remembered = max_remembered
+
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._executor_lock = threading.Lock()
+        self._slots = threading.Semaphore(max_in_flight or workers * 2)
+        # path → (마지막 이벤트 시각, 마지막으로 본 크기, 쓰기 종료 여부)
+        self._pending: Dict[str, Tuple[float, int, bool]] = {}
+        # path → 처리 제출된 (mtime, size), 같은 내용에 대한 중복 이벤트 무시용 (최근 max_remembered개만 유지)
+        self._processed: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._log_lock = threading.Lock()
+        self._stopped = False
+
+        self._observer = Observer()
+        self._observer.schedule(_IngestEventHandler(self), self.input_dir, recursive=True)
+        self._scheduler = threading.Thread(target=self._schedule_loop, name="hot-folder-scheduler", daemon=True)
+
+    def start(self, process_existing: bool = False) -> None:
+        """감시 시작 (process_existing이면 이미 있는 파일도 처리 대상으로 등록)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._scheduler.start()
+        self._observer.start()
+        if process_existing:
+            for dirpath, _, filenames in os.walk(self.input_dir):
+                for filename in filenames:
+                    self.notify(os.path.join(dirpath, filename), closed=True)
+
+    def stop(self) -> None:
+        """감시 중지, 처리 중인 파일은 완료될 때까지 대기"""
+        self._observer.stop()
+        self._observer.join()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._scheduler.join()
+        with self._executor_lock:
+            self._executor.shutdown(wait=True)
+
+    def notify(self, path: str, closed: bool = False) -> None:
+        """파일 이벤트 수신: 처리 대기 목록에 등록하거나 대기 시간 갱신"""
+        path = os.path.abspath(path)
+        if self.suffix and not path.lower().endswith(self.suffix):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return  # 이미 삭제/이동된 파일
+        with self._condition:
+            if self._processed.get(path) == (stat.st_mtime, stat.st_size):
+                return
+            self._pending[path] = (time.monotonic(), stat.st_size, closed)
+            self._condition.notify_all()
+
+    def _schedule_loop(self) -> None:
+        # 대기 중인 파일 중 가장 빠른 마감 시각까지만 잠들고, 새 이벤트가 오면 깨어남
+        while True:
+            ready = []
+            with self._condition:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                next_deadline = None
+                for path, (last_event, size, closed) in list(self._pending.items()):
+                    deadline = last_event if closed else last_event + self.settle_seconds
+                    if deadline <= now:
+                        ready.append((path, size, closed))
+                        del self._pending[path]
+                    elif next_deadline is None or deadline < next_deadline:
+                        next_deadline = deadline
+
+                if not ready:
+                    timeout = None if next_deadline is None else max(next_deadline - now, 0.0)
+                    self._condition.wait(timeout=timeout)
+                    continue
+
+            for path, size, closed in ready:
+                self._check_and_submit(path, size, closed)
+
+    def _check_and_submit(self, path: str, size: int, closed: bool) -> None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+
+        # 디바운스 기간 동안 크기가 바뀌었으면 아직 쓰는 중으로 보고 다시 대기
+        if not closed and stat.st_size != size:
+            with self._condition:
+                self._pending.setdefault(path, (time.monotonic(), stat.st_size, False))
+                self._condition.notify_all()
+            return
+
+        with self._condition:
+            self._processed[path] = (stat.st_mtime, stat.st_size)
+            self._processed.move_to_end(path)
+            while len(self._processed) > self.max_remembered:
+                self._processed.popitem(last=False)
+        output_path = output_path_for(path, self.input_dir, self.output_dir)
+        detected_at = time.time()
+
+        self._slots.acquire()  # 동시 처리 수 제한 (가득 차면 여기서 대기)
+        try:
+            future = self._submit(path, output_path)
+        except Exception as e:
+            # 제출 실패 시 슬롯을 돌려주고 로그에 남긴 뒤, 이후 이벤트로 다시 처리될 수 있게 함
+            self._slots.release()
+            with self._condition:
+                self._processed.pop(path, None)
+            self._write_log({
+                "path": path, "output": output_path, "status": "error", "error": f"제출 실패: {e}",
+                "detected_at": detected_at, "finished_at": time.time(),
+            })
+            return
+        future.add_done_callback(lambda f: self._on_done(f, path, output_path, detected_at))
+
+    def _submit(self, path: str, output_path: str) -> Future:
+        """프로세스 풀에 제출, 워커 비정상 종료로 풀이 망가졌으면 새 풀로 교체 후 한 번 재시도"""
+        with self._executor_lock:
+            try:
+                return self._executor.submit(process_file, path, output_path, self.options)
+            except BrokenProcessPool:
+                self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                return self._executor.submit(process_file, path, output_path, self.options)
+
+    def _on_done(self, future: Future, path: str, output_path: str, detected_at: float) -> None:
+        self._slots.release()
+        try:
+            record = future.result()
+        except Exception as e:  # 워커 프로세스 비정상 종료 등
+            record = {"path": path, "output": output_path, "status": "error", "error": str(e)}
+
+        record["detected_at"] = detected_at
+        record["finished_at"] = time.time()
+        self._write_log(record)
+
+    def _write_log(self, record: Dict[str, Any]) -> None:
+        with self._log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="핫 폴더 DICOM 수집 및 자동 전처리")
+    parser.add_argument("input_dir", help="감시할 디렉터리")
+    parser.add_argument("--output-dir", required=True, help="PNG 출력 디렉터리")
+    parser.add_argument("--mode", choices=["original", "clahe", "edge"], default="original")
+    parser.add_argument("--normalize-mode", choices=["minmax", "window"], default="minmax")
+    parser.add_argument("--clip-limit", type=float, default=2.0)
+    parser.add_argument("--tile-grid-size", type=int, default=8)
+    parser.add_argument("--canny-t1", type=int, default=50)
+    parser.add_argument("--canny-t2", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="처리 프로세스 수")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="동시 처리 최대 파일 수 (기본값 workers x 2)")
+    parser.add_argument("--settle-seconds", type=float, default=2.0, help="쓰기 완료 판단 대기 시간(초)")
+    parser.add_argument("--suffix", default=".dcm", help="처리할 확장자 (빈 문자열이면 모든 파일)")
+    parser.add_argument("--profile-dir", help="파일별 cProfile + tracemalloc 결과 저장 디렉터리")
+    parser.add_argument("--log", help="처리 로그 경로 (기본값 OUTPUT_DIR/processing_log.jsonl)")
+    parser.add_argument("--process-existing", action="store_true", help="시작 시 이미 있는 파일도 처리")
+    args = parser.parse_args()
+
+    service = HotFolderService(
+        args.input_dir,
+        args.output_dir,
+        BatchOptions(
+            mode=args.mode,
+            normalize_mode=args.normalize_mode,
+            clip_limit=args.clip_limit,
+            tile_grid_size=args.tile_grid_size,
+            canny_t1=args.canny_t1,
+            canny_t2=args.canny_t2,
+            profile_dir=args.profile_dir,
+        ),
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        settle_seconds=args.settle_seconds,
+        suffix=args.suffix,
+        log_path=args.log,
+    )
+    service.start(process_existing=args.process_existing)
+    print(f"감시 중: {service.input_dir} → {args.output_dir} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
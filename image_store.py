@@ -0,0 +1,136 @@
+# image_store.py
+"""
+디코딩된 의료영상 인메모리 저장소
+
+업로드된 DICOM을 한 번만 디코딩하여 보관하고, 이후 렌더링 요청은
+image_id로 참조하여 업로드/디코딩 비용 없이 처리할 수 있도록 합니다.
+
+특징:
+    - 바이트 단위 용량 제한 (초과 시 가장 오래 사용되지 않은 항목부터 제거, LRU)
+    - TTL (마지막 접근 이후 일정 시간이 지나면 만료)
+    - 스레드 안전 (threading.Lock)
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+@dataclass
+class StoredImage:
+    """
+    저장소에 보관되는 디코딩 결과
+
+    Attributes:
+        pixels: RescaleSlope/Intercept가 적용된 float32 픽셀 배열
+        window_center: DICOM Window Center (없으면 None)
+        window_width: DICOM Window Width (없으면 None)
+        metadata: 응답에 포함할 DICOM 메타데이터
+        content_hash: 업로드 원본 파일의 SHA-256 (ETag 계산용)
+        last_access: 마지막 접근 시각 (time.monotonic 기준)
+    """
+    pixels: np.ndarray
+    window_center: Optional[float]
+    window_width: Optional[float]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    content_hash: str = ""
+    last_access: float = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """저장소 용량 계산에 사용되는 바이트 수"""
+        return int(self.pixels.nbytes)
+
+
+class ImageStore:
+    """
+    바이트 제한 LRU + TTL 인메모리 이미지 저장소
+
+    Args:
+        max_bytes: 저장소 전체 최대 바이트 수
+        ttl_seconds: 마지막 접근 이후 만료까지의 시간(초), 0 이하면 만료 없음
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, StoredImage]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        """현재 저장된 픽셀 데이터의 총 바이트 수"""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, entry: StoredImage) -> str:
+        """
+        디코딩 결과를 저장하고 image_id 반환
+
+        Raises:
+            ValueError: 단일 항목이 저장소 최대 용량보다 큰 경우
+        """
+        if entry.nbytes > self.max_bytes:
+            raise ValueError(
+                f"이미지가 저장소 용량을 초과합니다 ({entry.nbytes} > {self.max_bytes} bytes)"
+            )
+
+        image_id = uuid.uuid4().hex
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            entry.last_access = now
+            self._entries[image_id] = entry
+            self._total_bytes += entry.nbytes
+            self._evict_to_fit()
+        return image_id
+
+    def get(self, image_id: str) -> Optional[StoredImage]:
+        """image_id로 항목 조회 (만료/제거된 경우 None), 조회 시 LRU 순서와 TTL 갱신"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(image_id)
+            if entry is None:
+                return None
+            if self._is_expired(entry, now):
+                self._remove(image_id)
+                return None
+            entry.last_access = now
+            self._entries.move_to_end(image_id)
+            return entry
+
+    def delete(self, image_id: str) -> bool:
+        """항목 삭제, 존재했으면 True"""
+        with self._lock:
+            if image_id not in self._entries:
+                return False
+            self._remove(image_id)
+            return True
+
+    def _is_expired(self, entry: StoredImage, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.last_access > self.ttl_seconds
+
+    def _remove(self, image_id: str) -> None:
+        entry = self._entries.pop(image_id)
+        self._total_bytes -= entry.nbytes
+
+    def _purge_expired(self, now: float) -> None:
+        # OrderedDict는 접근 순서로 정렬되어 있으므로 앞쪽부터 만료 검사
+        while self._entries:
+            image_id, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry, now):
+                break
+            self._remove(image_id)
+
+    def _evict_to_fit(self) -> None:
+        # 용량 초과 시 가장 오래 사용되지 않은 항목부터 제거
+        while self._total_bytes > self.max_bytes and self._entries:
+            image_id = next(iter(self._entries))
+            self._remove(image_id)
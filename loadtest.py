@@ -0,0 +1,288 @@
+# loadtest.py
+"""
+FastAPI 서비스 부하 테스트 도구
+
+api.py를 uvicorn으로 로컬 실행한 뒤, 여러 크기의 합성 DICOM과 각 전처리 모드로
+동시 요청을 보내 처리량, 지연 시간(p50/p95/p99), 오류율, 워커 RSS를 JSON으로 보고합니다.
+이전 결과(--baseline)와 비교하여 처리량 회귀를 검출할 수 있습니다.
+
+실행 방법:
+    python loadtest.py --sizes 512,1024,2048 --concurrency 1,4,16 --duration 15 --output report.json
+    python loadtest.py --baseline report.json --max-regression 0.1   # 회귀 시 종료 코드 1
+    python loadtest.py --url http://127.0.0.1:8000                  # 이미 실행 중인 서버 사용
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import psutil
+
+from synthetic_dicom import make_synthetic_dicom
+
+# CLI 모드 이름 → api.py 전처리 모드
+API_MODES = {
+    "original": "원본만 보기",
+    "clahe": "CLAHE 대비 향상",
+    "edge": "에지 검출(Canny)",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    """api.py를 uvicorn 하위 프로세스로 실행"""
+    command = [
+        sys.executable, "-m", "uvicorn", "api:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, **env},
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    """/metrics가 응답할 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"서버가 {timeout}초 안에 시작되지 않았습니다: {base_url}")
+
+
+class RssSampler:
+    """서버 프로세스(및 uvicorn 워커 하위 프로세스)의 RSS 합계를 주기적으로 기록"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.2):
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.samples: List[int] = []
+
+    def _rss(self) -> int:
+        total = 0
+        for proc in [self.process, *self.process.children(recursive=True)]:
+            try:
+                total += proc.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    async def run(self, stop: asyncio.Event) -> None:
+        if self.process is None:
+            return
+        while not stop.is_set():
+            self.samples.append(self._rss())
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.samples:
+            return {"rss_peak_mb": None, "rss_mean_mb": None}
+        return {
+            "rss_peak_mb": round(max(self.samples) / 2**20, 1),
+            "rss_mean_mb": round(sum(self.samples) / len(self.samples) / 2**20, 1),
+        }
+
+
+def _latency_summary(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    values = np.asarray(latencies_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def run_level(
+    base_url: str,
+    payloads: List[Tuple[str, str, bytes]],
+    concurrency: int,
+    duration: float,
+    server_pid: Optional[int],
+) -> Dict[str, Any]:
+    """
+    단일 동시성 수준에서 duration초 동안 요청을 반복 전송
+
+    Args:
+        payloads: (크기 라벨, 모드, DICOM 바이트) 목록, 라운드 로빈으로 사용
+    """
+    records: List[Tuple[str, str, int, float]] = []  # (size, mode, status, latency_ms)
+    cycle = itertools.cycle(payloads)
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                size, mode, file_bytes = next(cycle)
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/preprocess",
+                        files={"file": ("synthetic.dcm", file_bytes, "application/dicom")},
+                        data={"mode": API_MODES[mode], "normalize_mode": "window"},
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                records.append((size, mode, status, (time.perf_counter() - started) * 1000.0))
+
+        sampler = RssSampler(server_pid)
+        stop = asyncio.Event()
+        sampler_task = asyncio.create_task(sampler.run(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler_task
+
+    ok_latencies = [latency for _, _, status, latency in records if status == 200]
+    errors = sum(1 for _, _, status, _ in records if status != 200)
+    status_counts: Dict[str, int] = {}
+    for _, _, status, _ in records:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+
+    breakdown = {}
+    for size, mode, _ in payloads:
+        latencies = [lat for s, m, st, lat in records if s == size and m == mode and st == 200]
+        breakdown[f"{size}/{mode}"] = {"requests": len(latencies), **_latency_summary(latencies)}
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok_latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "status_counts": status_counts,
+        **_latency_summary(ok_latencies),
+        **sampler.summary(),
+        "by_payload": breakdown,
+    }
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """동시성 수준별 처리량이 baseline 대비 max_regression 비율 이상 떨어졌으면 메시지 반환"""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in report["levels"]:
+        base = previous.get(level["concurrency"])
+        if not base or not base["throughput_rps"]:
+            continue
+        change = level["throughput_rps"] / base["throughput_rps"] - 1.0
+        level["throughput_change"] = round(change, 4)
+        if change < -max_regression:
+            regressions.append(
+                f"concurrency={level['concurrency']}: "
+                f"{base['throughput_rps']} → {level['throughput_rps']} rps ({change:+.1%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="/preprocess 부하 테스트")
+    parser.add_argument("--url", help="이미 실행 중인 서버 주소 (지정하지 않으면 uvicorn으로 직접 실행)")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="서버 환경 변수 (예: MEMORY_BUDGET_BYTES=1073741824), 반복 지정 가능")
+    parser.add_argument("--sizes", default="512,1024,2048", help="합성 DICOM 한 변 크기 목록")
+    parser.add_argument("--modes", default="original,clahe,edge", help="전처리 모드 목록")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시성 수준 목록")
+    parser.add_argument("--duration", type=float, default=10.0, help="수준별 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="측정 전 워밍업 시간(초)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="허용 처리량 감소 비율")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    unknown = [mode for mode in modes if mode not in API_MODES]
+    if unknown:
+        parser.error(f"알 수 없는 모드: {unknown} (가능: {list(API_MODES)})")
+
+    payloads = [
+        (f"{size}x{size}", mode, make_synthetic_dicom(size, size, seed=size))
+        for size in sizes for mode in modes
+    ]
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        server_env = dict(item.split("=", 1) for item in args.server_env)
+        server = start_server(port, args.server_workers, server_env)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        wait_until_ready(base_url)
+        server_pid = server.pid if server else None
+
+        if args.warmup > 0:
+            asyncio.run(run_level(base_url, payloads, max(levels), args.warmup, None))
+
+        report = {
+            "config": {
+                "url": base_url if args.url else None,
+                "server_workers": args.server_workers if server else None,
+                "server_env": args.server_env,
+                "sizes": sizes,
+                "modes": modes,
+                "duration_seconds": args.duration,
+                "cpu_count": os.cpu_count(),
+            },
+            "levels": [
+                asyncio.run(run_level(base_url, payloads, level, args.duration, server_pid))
+                for level in levels
+            ],
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.max_regression)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,36 @@ Streamlit UI(app.py)와 FastAPI(api.py)에서 공통으로 사용됩니다.
 
 주요 기능:
     - DICOM → PIL 변환 (Window Level / Min-Max 정규화)
+    - DICOM 헤더 전용 로딩 (픽셀 데이터 디코딩 없음)
+    - 헤더 기반 전처리 메모리 사용량 추정
+    - 점진적 렌더링용 미리보기 축소
     - PNG/JPG/BMP → PIL 변환
-    - CLAHE 대비 향상
-    - Canny 에지 검출
+    - CLAHE 대비 향상 (CLAHE 객체/입력 재사용 엔진 포함)
+    - Canny 에지 검출 (에지 맵만 반환하는 detect_edges 포함)
+    - 같은 크기 이미지 스택 (N, H, W)의 벡터화 배치 처리
 """
+import os
+import threading
 import pydicom
+from pydicom.multival import MultiValue
 import numpy as np
 import cv2
 from PIL import Image
 from io import BytesIO
-from typing import Tuple, Literal
+from collections import OrderedDict
+from typing import Hashable, List, Tuple, Literal, Optional, Sequence, Union
 
 # 타입 힌트 정의
 NormalizationMode = Literal["minmax", "window"]
+PipelineName = Literal["original", "clahe", "edge"]
+
+# 메모리 추정용 단계별 픽셀당 바이트 수 (dicom_to_pil 구현 기준의 보수적 추정치)
+# - 디코딩/정규화: float32 변환, rescale, 정규화 임시 버퍼가 최대 4개 동시에 존재
+# - 파이프라인: RGB 배열 + PIL 사본, 필터 적용 시 gray/결과/RGB/PIL 버퍼 추가
+# - 인코딩: PNG 버퍼(최악의 경우 무압축 RGB) + Base64 문자열
+_FLOAT_STAGE_BYTES_PER_PIXEL = 16
+_PIPELINE_BYTES_PER_PIXEL = {"original": 6, "clahe": 17, "edge": 17}
+_ENCODE_BYTES_PER_PIXEL = 7
 
 
 def apply_window_level(
@@ -73,6 +90,163 @@ def load_image(file_bytes: bytes) -> Image.Image:
     except Exception as e:
         raise ValueError(f"이미지 파일 처리 실패: {e}")
 
+def get_window_values(
+    dcm: pydicom.Dataset
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    DICOM 메타데이터에서 Window Center/Width 추출
+
+    다중값일 경우 첫 번째 값을 사용합니다.
+
+    Args:
+        dcm: pydicom Dataset (헤더만 읽은 Dataset도 가능)
+
+    Returns:
+        (window_center, window_width) 튜플
+        값이 없거나 숫자로 해석할 수 없거나 WW <= 0이면 (None, None) (호출 측에서 minmax로 대체)
+    """
+    wc = dcm.get('WindowCenter', None)
+    ww = dcm.get('WindowWidth', None)
+    if isinstance(wc, (list, tuple, MultiValue)):
+        wc = wc[0] if len(wc) else None
+    if isinstance(ww, (list, tuple, MultiValue)):
+        ww = ww[0] if len(ww) else None
+
+    if wc is None or ww is None:
+        return None, None
+    try:
+        wc, ww = float(wc), float(ww)
+    except (TypeError, ValueError):
+        return None, None
+    if not (np.isfinite(wc) and np.isfinite(ww)) or ww <= 0:
+        return None, None
+    return wc, ww
+
+def read_dicom_header(
+    source: Union[bytes, str, os.PathLike],
+    specific_tags: Optional[List[str]] = None
+) -> pydicom.Dataset:
+    """
+    픽셀 데이터를 읽지 않고 DICOM 헤더만 로드
+
+    인덱싱, 메모리 추정 등 메타데이터만 필요한 경우 전체 디코딩 비용을 피하기 위해 사용합니다.
+
+    Args:
+        source: DICOM 파일 경로 또는 바이트 데이터
+        specific_tags: 읽을 태그 키워드 목록 (None이면 PixelData 이전의 모든 태그)
+
+    Returns:
+        PixelData가 없는 pydicom.Dataset
+
+    Raises:
+        ValueError: DICOM 헤더 파싱 실패 시
+    """
+    try:
+        fp = BytesIO(source) if isinstance(source, bytes) else source
+        return pydicom.dcmread(fp, stop_before_pixels=True, specific_tags=specific_tags)
+    except Exception as e:
+        raise ValueError(f"DICOM 헤더 처리 실패: {e}")
+
+def decode_dicom(file_bytes: bytes) -> Tuple[np.ndarray, pydicom.Dataset]:
+    """
+    DICOM 파일을 디코딩하고 RescaleSlope/Intercept를 적용
+
+    정규화 이전 단계의 float32 픽셀 배열을 반환하므로,
+    한 번 디코딩한 결과를 여러 정규화/전처리 조합에 재사용할 수 있습니다.
+
+    Args:
+        file_bytes: DICOM 파일의 바이트 데이터
+
+    Returns:
+        (float32 픽셀 배열, pydicom.Dataset) 튜플
+
+    Raises:
+        ValueError: DICOM 파일 파싱 실패 시
+    """
+    try:
+        dcm = pydicom.dcmread(BytesIO(file_bytes))
+        img_raw = dcm.pixel_array.astype(np.float32)
+
+        # RescaleSlope/Intercept 적용 (DICOM 표준)
+        # CT/MR 등에서 저장된 픽셀값을 실제 물리값(HU 등)으로 변환
+        if 'RescaleSlope' in dcm and 'RescaleIntercept' in dcm:
+            slope = float(dcm.RescaleSlope)
+            intercept = float(dcm.RescaleIntercept)
+            img = img_raw * slope + intercept
+        else:
+            img = img_raw
+
+        return img, dcm
+
+    except Exception as e:
+        raise ValueError(f"DICOM 파일 처리 실패: {e}")
+
+def normalize_to_pil(
+    img: np.ndarray,
+    normalize_mode: NormalizationMode = "minmax",
+    window_center: Optional[float] = None,
+    window_width: Optional[float] = None
+) -> Image.Image:
+    """
+    Rescale이 적용된 픽셀 배열을 0-255로 정규화하여 RGB PIL 이미지로 변환
+
+    Args:
+        img: decode_dicom()이 반환한 float32 픽셀 배열
+        normalize_mode: "minmax" 또는 "window"
+        window_center: Window Center (window 모드에서 사용)
+        window_width: Window Width (window 모드에서 사용)
+
+    Returns:
+        RGB 모드의 PIL Image
+    """
+    img_normalized = None
+
+    if normalize_mode == "window":
+        if window_center is not None and window_width is not None and window_width > 0:
+            img_normalized = apply_window_level(img, window_center, window_width)
+        else:
+            # Window 정보 없으면 Min/Max로 fallback
+            normalize_mode = "minmax"
+
+    # Min/Max 정규화 (기본값 또는 fallback)
+    if img_normalized is None or normalize_mode == "minmax":
+        img_normalized = img - img.min()
+        max_val = img_normalized.max()
+        if max_val > 0:
+            img_normalized = (img_normalized / max_val) * 255.0
+        img_normalized = img_normalized.astype(np.uint8)
+
+    # 그레이스케일 → RGB 변환 (Streamlit/FastAPI 호환)
+    if img_normalized.ndim == 2:
+        img_rgb = cv2.cvtColor(img_normalized, cv2.COLOR_GRAY2RGB)
+    elif img_normalized.ndim == 3 and img_normalized.shape[2] == 1:
+        img_rgb = cv2.cvtColor(img_normalized.squeeze(2), cv2.COLOR_GRAY2RGB)
+    else:
+        img_rgb = img_normalized
+
+    return Image.fromarray(img_rgb)
+
+def downscale_for_preview(img: np.ndarray, max_size: int = 512) -> Tuple[np.ndarray, float]:
+    """
+    점진적 렌더링의 미리보기용 축소 (긴 변이 max_size 이하가 되도록 INTER_AREA)
+
+    정규화 이전의 float32 배열에 적용하므로, 축소본을 normalize_to_pil → 전처리에 그대로 넘길 수 있습니다.
+
+    Args:
+        img: decode_dicom()이 반환한 픽셀 배열
+        max_size: 미리보기 긴 변의 최대 픽셀 수
+
+    Returns:
+        (축소된 배열, 축소 비율) 튜플 (이미 작으면 원본 배열과 1.0)
+    """
+    rows, columns = img.shape[:2]
+    scale = min(1.0, max_size / max(rows, columns))
+    if scale >= 1.0:
+        return img, 1.0
+
+    size = (max(1, int(round(columns * scale))), max(1, int(round(rows * scale))))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA), scale
+
 def dicom_to_pil(
     file_bytes: bytes,
     normalize_mode: NormalizationMode = "minmax"
@@ -82,6 +256,7 @@ def dicom_to_pil(
 
     DICOM 표준에 따라 RescaleSlope/Intercept를 적용하고,
     선택한 정규화 모드로 0-255 범위의 이미지를 생성합니다.
+    (decode_dicom + normalize_to_pil 조합)
 
     Args:
         file_bytes: DICOM 파일의 바이트 데이터
@@ -97,57 +272,174 @@ def dicom_to_pil(
     Raises:
         ValueError: DICOM 파일 파싱 실패 시
     """
+    # Step 1: 디코딩 + RescaleSlope/Intercept 적용
+    img, dcm = decode_dicom(file_bytes)
+
+    # Step 2~3: 정규화 (Window Level 또는 Min/Max) 및 RGB 변환
     try:
-        dcm = pydicom.dcmread(BytesIO(file_bytes))
-        img_raw = dcm.pixel_array.astype(np.float32)
+        wc, ww = get_window_values(dcm)
+        return normalize_to_pil(img, normalize_mode, wc, ww), dcm
+    except Exception as e:
+        raise ValueError(f"DICOM 파일 처리 실패: {e}")
 
-        # Step 1: RescaleSlope/Intercept 적용 (DICOM 표준)
-        # CT/MR 등에서 저장된 픽셀값을 실제 물리값(HU 등)으로 변환
-        if 'RescaleSlope' in dcm and 'RescaleIntercept' in dcm:
-            slope = float(dcm.RescaleSlope)
-            intercept = float(dcm.RescaleIntercept)
-            img = img_raw * slope + intercept
-        else:
-            img = img_raw
+def estimate_peak_memory(
+    rows: int,
+    columns: int,
+    frames: int = 1,
+    samples_per_pixel: int = 1,
+    bits_allocated: int = 16,
+    pipeline: Optional[PipelineName] = "original",
+    include_decode: bool = True,
+    include_encode: bool = True
+) -> int:
+    """
+    이미지 크기로 전처리 1건의 최대 메모리 사용량(바이트) 추정
 
-        # Step 2: 정규화 (Window Level 또는 Min/Max)
-        img_normalized = None
-
-        if normalize_mode == "window":
-            # Window Center/Width가 다중값일 경우 첫 번째 사용
-            wc = dcm.get('WindowCenter', None)
-            ww = dcm.get('WindowWidth', None)
-            if isinstance(wc, (list, tuple)):
-                wc = wc[0]
-            if isinstance(ww, (list, tuple)):
-                ww = ww[0]
-
-            if wc is not None and ww is not None and float(ww) > 0:
-                img_normalized = apply_window_level(img, float(wc), float(ww))
-            else:
-                # Window 정보 없으면 Min/Max로 fallback
-                normalize_mode = "minmax"
-
-        # Min/Max 정규화 (기본값 또는 fallback)
-        if img_normalized is None or normalize_mode == "minmax":
-            img_normalized = img - img.min()
-            max_val = img_normalized.max()
-            if max_val > 0:
-                img_normalized = (img_normalized / max_val) * 255.0
-            img_normalized = img_normalized.astype(np.uint8)
-
-        # Step 3: 그레이스케일 → RGB 변환 (Streamlit/FastAPI 호환)
-        if img_normalized.ndim == 2:
-            img_rgb = cv2.cvtColor(img_normalized, cv2.COLOR_GRAY2RGB)
-        elif img_normalized.ndim == 3 and img_normalized.shape[2] == 1:
-            img_rgb = cv2.cvtColor(img_normalized.squeeze(2), cv2.COLOR_GRAY2RGB)
-        else:
-            img_rgb = img_normalized
+    디코딩 단계(원본 픽셀 + float32 버퍼)와 후처리 단계(RGB/필터/인코딩 버퍼)는
+    동시에 존재하지 않으므로 두 단계 중 큰 값을 반환합니다.
 
-        return Image.fromarray(img_rgb), dcm
+    Args:
+        rows, columns, frames, samples_per_pixel, bits_allocated: DICOM 헤더 값
+        pipeline: "original", "clahe", "edge" (None이면 디코딩 단계만 추정)
+        include_decode: 픽셀 디코딩 + float32 변환 단계 포함 여부
+        include_encode: PNG/Base64 인코딩 버퍼 포함 여부
+
+    Returns:
+        추정 최대 메모리 (bytes)
+    """
+    pixels = max(rows, 0) * max(columns, 0) * max(frames, 1) * max(samples_per_pixel, 1)
+
+    if include_decode:
+        raw_bytes = pixels * ((max(bits_allocated, 1) + 7) // 8)
+        decode_stage = raw_bytes + pixels * _FLOAT_STAGE_BYTES_PER_PIXEL
+    else:
+        # 이미 디코딩된 float32 배열에서 정규화만 수행 (원본 배열은 별도 보관)
+        decode_stage = pixels * (_FLOAT_STAGE_BYTES_PER_PIXEL - 4)
+
+    post_stage = 0
+    if pipeline is not None:
+        post_stage = pixels * _PIPELINE_BYTES_PER_PIXEL[pipeline]
+        if include_encode:
+            post_stage += pixels * _ENCODE_BYTES_PER_PIXEL
+
+    return max(decode_stage, post_stage)
+
+def estimate_dicom_peak_memory(
+    dcm: pydicom.Dataset,
+    pipeline: Optional[PipelineName] = "original",
+    include_encode: bool = True
+) -> int:
+    """
+    DICOM 헤더(read_dicom_header 결과)로 전처리 1건의 최대 메모리 사용량 추정
+
+    Raises:
+        ValueError: Rows/Columns 정보가 없는 경우
+    """
+    if 'Rows' not in dcm or 'Columns' not in dcm:
+        raise ValueError("DICOM 헤더에 Rows/Columns 정보가 없습니다")
+
+    return estimate_peak_memory(
+        rows=int(dcm.Rows),
+        columns=int(dcm.Columns),
+        frames=int(dcm.get('NumberOfFrames', 1) or 1),
+        samples_per_pixel=int(dcm.get('SamplesPerPixel', 1) or 1),
+        bits_allocated=int(dcm.get('BitsAllocated', 16) or 16),
+        pipeline=pipeline,
+        include_encode=include_encode,
+    )
+
+class ClaheEngine:
+    """
+    CLAHE 재사용 엔진
+
+    같은 이미지를 clip limit/타일 크기만 바꿔 반복 적용할 때(app.py 슬라이더 등) 사용합니다.
+        - (clip_limit, tile_grid_size)별 cv2 CLAHE 객체를 스레드별로 캐시 (CLAHE 객체는 스레드 간 공유 불가)
+        - cache_key별 그레이스케일 입력을 LRU로 보관하여 PIL → NumPy 복사와 RGB → Gray 변환을 한 번만 수행
+
+    Args:
+        max_images: 보관할 그레이스케일 입력 수
+        max_clahe_objects: 스레드별로 보관할 CLAHE 객체 수
+    """
+
+    def __init__(self, max_images: int = 8, max_clahe_objects: int = 64):
+        self.max_images = max_images
+        self.max_clahe_objects = max_clahe_objects
+        self._local = threading.local()
+        self._inputs: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clip_limit: float, tile_grid_size: int) -> "cv2.CLAHE":
+        """현재 스레드의 (clip_limit, tile_grid_size) CLAHE 객체 (없으면 생성)"""
+        tile_grid_size = max(int(tile_grid_size), 1)
+        objects = getattr(self._local, "objects", None)
+        if objects is None:
+            objects = self._local.objects = {}
+
+        key = (float(clip_limit), tile_grid_size)
+        clahe = objects.get(key)
+        if clahe is None:
+            if len(objects) >= self.max_clahe_objects:
+                del objects[next(iter(objects))]  # 가장 먼저 만든 객체 제거
+            clahe = objects[key] = cv2.createCLAHE(
+                clipLimit=clip_limit,
+                tileGridSize=(tile_grid_size, tile_grid_size)
+            )
+        return clahe
+
+    def apply(
+        self,
+        gray: np.ndarray,
+        clip_limit: float = 2.0,
+        tile_grid_size: int = 8,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """(H, W) uint8 그레이스케일 배열에 CLAHE 적용 (out을 주면 직접 기록)"""
+        return self.get(clip_limit, tile_grid_size).apply(gray, dst=out)
+
+    def gray_input(self, cache_key: Hashable, pil_img: Image.Image) -> np.ndarray:
+        """cache_key의 그레이스케일 입력 (처음 요청 시 pil_img에서 변환하여 보관)"""
+        with self._lock:
+            gray = self._inputs.get(cache_key)
+            if gray is not None:
+                self._inputs.move_to_end(cache_key)
+                return gray
+
+        img = np.asarray(pil_img)
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else np.ascontiguousarray(img)
+
+        with self._lock:
+            self._inputs[cache_key] = gray
+            self._inputs.move_to_end(cache_key)
+            while len(self._inputs) > self.max_images:
+                self._inputs.popitem(last=False)
+        return gray
+
+    def apply_cached(
+        self,
+        cache_key: Hashable,
+        pil_img: Image.Image,
+        clip_limit: float = 2.0,
+        tile_grid_size: int = 8
+    ) -> Image.Image:
+        """
+        cache_key로 보관한 입력에 CLAHE 적용
+
+        cache_key는 같은 이미지에 대해서만 같은 값이어야 합니다 (예: 파일 해시 + 정규화 방식).
+
+        Returns:
+            CLAHE가 적용된 그레이스케일("L") PIL 이미지
+        """
+        return Image.fromarray(self.apply(self.gray_input(cache_key, pil_img), clip_limit, tile_grid_size))
+
+    def clear(self) -> None:
+        """보관 중인 입력 제거 (CLAHE 객체는 스레드별로 유지)"""
+        with self._lock:
+            self._inputs.clear()
+
+
+# apply_clahe / clahe_stack 공용 CLAHE 객체 캐시
+clahe_engine = ClaheEngine()
 
-    except Exception as e:
-        raise ValueError(f"DICOM 파일 처리 실패: {e}")
 
 def apply_clahe(
     pil_img: Image.Image,
@@ -170,18 +462,11 @@ def apply_clahe(
     Returns:
         CLAHE가 적용된 RGB PIL 이미지
     """
-    if tile_grid_size < 1:
-        tile_grid_size = 1
-
-    img = np.array(pil_img)
+    img = np.asarray(pil_img)
     gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
 
-    # CLAHE 객체 생성 및 적용
-    clahe = cv2.createCLAHE(
-        clipLimit=clip_limit,
-        tileGridSize=(tile_grid_size, tile_grid_size)
-    )
-    cl = clahe.apply(gray)
+    # (clip_limit, tile_grid_size)별로 캐시된 CLAHE 객체 적용
+    cl = clahe_engine.apply(gray, clip_limit, tile_grid_size)
 
     # RGB로 변환하여 반환
     cl_rgb = cv2.cvtColor(cl, cv2.COLOR_GRAY2RGB)
@@ -209,12 +494,262 @@ def apply_edge(
     Returns:
         에지가 검출된 RGB PIL 이미지 (흰색 에지, 검은색 배경)
     """
-    img = np.array(pil_img)
-    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-
-    # Canny 에지 검출
-    edges = cv2.Canny(gray, threshold1, threshold2)
+    edges = detect_edges(pil_img, threshold1, threshold2)
 
     # RGB로 변환하여 반환
     edges_rgb = cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
-    return Image.fromarray(edges_rgb)
\ No newline at end of file
+    return Image.fromarray(edges_rgb)
+
+
+def detect_edges(
+    pil_img: Image.Image,
+    threshold1: int = 50,
+    threshold2: int = 150
+) -> np.ndarray:
+    """
+    Canny 에지 맵만 반환 (RGB 변환 없음)
+
+    edge_codec으로 비트 단위 압축 전송할 때 사용합니다.
+
+    Args:
+        pil_img: 입력 PIL 이미지 (RGB 또는 그레이스케일)
+        threshold1, threshold2: Canny 임계값 (apply_edge와 동일)
+
+    Returns:
+        (H, W) uint8 에지 맵 (에지 = 255, 배경 = 0)
+    """
+    img = np.asarray(pil_img)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+
+    # Canny 에지 검출
+    return cv2.Canny(gray, threshold1, threshold2)
+
+# *****************************************************************
+# 배치(스택) 처리: 같은 크기의 (N, H, W) 이미지 묶음을 벡터화하여 처리
+# *****************************************************************
+
+def _per_image_values(
+    values: Union[None, float, Sequence[Optional[float]], np.ndarray],
+    n: int
+) -> np.ndarray:
+    """스칼라/시퀀스/None을 길이 n의 float64 배열로 변환 (값 없음은 NaN)"""
+    if values is None:
+        return np.full(n, np.nan)
+    if np.isscalar(values):
+        return np.full(n, float(values))
+    arr = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if arr.shape != (n,):
+        raise ValueError(f"이미지 수({n})와 값 개수({arr.shape[0]})가 다릅니다")
+    return arr
+
+def load_dicom_stack(
+    sources: Sequence[Union[bytes, str, os.PathLike]],
+    out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, List[pydicom.Dataset]]:
+    """
+    같은 크기의 DICOM 여러 개를 하나의 (N, H, W) float32 스택으로 디코딩
+
+    픽셀은 미리 할당한 스택에 바로 복사되고, RescaleSlope/Intercept는
+    이미지별 값을 브로드캐스트하여 스택 전체에 한 번에 적용합니다.
+
+    Args:
+        sources: DICOM 파일 경로 또는 바이트 목록
+        out: 결과를 기록할 (N, H, W) float32 배열 (None이면 새로 할당)
+
+    Returns:
+        (float32 스택, Dataset 목록) 튜플
+
+    Raises:
+        ValueError: 디코딩 실패 또는 이미지 크기가 서로 다른 경우
+    """
+    datasets: List[pydicom.Dataset] = []
+    slopes = np.ones(len(sources), dtype=np.float32)
+    intercepts = np.zeros(len(sources), dtype=np.float32)
+
+    for i, source in enumerate(sources):
+        try:
+            fp = BytesIO(source) if isinstance(source, bytes) else source
+            dcm = pydicom.dcmread(fp)
+            pixels = dcm.pixel_array
+        except Exception as e:
+            raise ValueError(f"DICOM 파일 처리 실패 ({i}번째): {e}")
+
+        if pixels.ndim != 2:
+            raise ValueError(f"스택 처리는 단일 프레임 그레이스케일만 지원합니다 ({i}번째: {pixels.shape})")
+        if out is None:
+            out = np.empty((len(sources),) + pixels.shape, dtype=np.float32)
+        if pixels.shape != out.shape[1:]:
+            raise ValueError(
+                f"이미지 크기가 다릅니다 ({i}번째: {pixels.shape}, 기대값: {out.shape[1:]})"
+            )
+
+        np.copyto(out[i], pixels, casting="unsafe")
+        if 'RescaleSlope' in dcm and 'RescaleIntercept' in dcm:
+            slopes[i] = float(dcm.RescaleSlope)
+            intercepts[i] = float(dcm.RescaleIntercept)
+
+        # PixelData는 스택에 복사했으므로 Dataset에서 제거하여 메모리 절약
+        del dcm.PixelData
+        datasets.append(dcm)
+
+    if out is None:
+        raise ValueError("디코딩할 DICOM이 없습니다")
+
+    rescale_stack(out, slopes, intercepts, out=out)
+    return out, datasets
+
+def rescale_stack(
+    raw: np.ndarray,
+    slope: Union[float, Sequence[float], np.ndarray] = 1.0,
+    intercept: Union[float, Sequence[float], np.ndarray] = 0.0,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    (N, H, W) 스택에 RescaleSlope/Intercept 일괄 적용
+
+    Args:
+        raw: 원본 픽셀 스택 (정수 또는 실수형)
+        slope, intercept: 공통 스칼라 또는 이미지별 (N,) 값
+        out: 결과 float32 배열 (raw와 같은 배열을 주면 제자리 연산)
+
+    Returns:
+        float32 스택
+    """
+    if out is None:
+        out = np.empty(raw.shape, dtype=np.float32)
+
+    n = raw.shape[0]
+    slope_arr = np.broadcast_to(np.asarray(slope, dtype=np.float32), (n,)).reshape(n, 1, 1)
+    intercept_arr = np.broadcast_to(np.asarray(intercept, dtype=np.float32), (n,)).reshape(n, 1, 1)
+
+    np.multiply(raw, slope_arr, out=out, casting="unsafe")
+    np.add(out, intercept_arr, out=out)
+    return out
+
+
+def normalize_stack(
+    stack: np.ndarray,
+    normalize_mode: NormalizationMode = "minmax",
+    window_center: Union[None, float, Sequence[Optional[float]]] = None,
+    window_width: Union[None, float, Sequence[Optional[float]]] = None,
+    per_image: bool = True,
+    out: Optional[np.ndarray] = None,
+    chunk_size: int = 16,
+    value_range: Optional[Tuple[float, float]] = None
+) -> np.ndarray:
+    """
+    (N, H, W) float32 스택을 0-255 uint8로 일괄 정규화
+
+    단일 이미지 경로(normalize_to_pil)와 동일한 연산 순서로 계산하므로 결과가 같습니다.
+    Window 값이 없거나 WW <= 0인 이미지는 Min/Max로 fallback 합니다.
+    작업 버퍼는 chunk_size 장 분량만 할당하여 재사용합니다.
+
+    Args:
+        stack: Rescale이 적용된 float32 스택
+        normalize_mode: "minmax" 또는 "window"
+        window_center, window_width: 공통 스칼라 또는 이미지별 (N,) 값 (None = 값 없음)
+        per_image: True면 Min/Max 통계를 이미지별로, False면 스택 전체 공통으로 계산
+        out: 결과를 기록할 (N, H, W) uint8 배열 (None이면 새로 할당)
+        chunk_size: 한 번에 처리할 이미지 수
+        value_range: 공통 (min, max) 직접 지정 (볼륨을 나눠 처리할 때 전체 통계 사용, per_image 무시)
+
+    Returns:
+        uint8 스택
+    """
+    n = stack.shape[0]
+    if out is None:
+        out = np.empty(stack.shape, dtype=np.uint8)
+
+    has_window = np.zeros(n, dtype=bool)
+    if normalize_mode == "window":
+        wc = _per_image_values(window_center, n)
+        ww = _per_image_values(window_width, n)
+        has_window = np.isfinite(wc) & np.isfinite(ww) & (ww > 0)
+
+    # 이미지별 [lo, hi] 범위와 폭 계산 (모든 이미지에 Window가 있으면 Min/Max 통계 계산 생략)
+    if has_window.all():
+        lo = np.zeros(n)
+        hi = np.zeros(n)
+    elif value_range is not None:
+        lo = np.full(n, float(value_range[0]))
+        hi = np.full(n, float(value_range[1]))
+    elif per_image:
+        lo = stack.min(axis=(1, 2)).astype(np.float64)
+        hi = stack.max(axis=(1, 2)).astype(np.float64)
+    else:
+        lo = np.full(n, float(stack.min()))
+        hi = np.full(n, float(stack.max()))
+    width = (hi.astype(np.float32) - lo.astype(np.float32)).astype(np.float64)
+    width[width <= 0] = 1.0  # 상수 이미지는 0으로 정규화됨
+
+    if normalize_mode == "window":
+        lo = np.where(has_window, wc - ww / 2.0, lo)
+        hi = np.where(has_window, wc + ww / 2.0, hi)
+        width = np.where(has_window, ww, width)
+
+    lo32 = lo.astype(np.float32).reshape(n, 1, 1)
+    hi32 = hi.astype(np.float32).reshape(n, 1, 1)
+    width32 = width.astype(np.float32).reshape(n, 1, 1)
+
+    chunk_size = max(1, min(chunk_size, n))
+    work = np.empty((chunk_size,) + stack.shape[1:], dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        buf = work[:end - start]
+        np.clip(stack[start:end], lo32[start:end], hi32[start:end], out=buf)
+        np.subtract(buf, lo32[start:end], out=buf)
+        np.divide(buf, width32[start:end], out=buf)
+        np.multiply(buf, np.float32(255.0), out=buf)
+        np.copyto(out[start:end], buf, casting="unsafe")
+
+    return out
+
+def clahe_stack(
+    stack: np.ndarray,
+    clip_limit: float = 2.0,
+    tile_grid_size: int = 8,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    (N, H, W) uint8 그레이스케일 스택에 CLAHE 적용
+
+    캐시된 CLAHE 객체를 재사용하고, RGB 변환 없이 그레이스케일에 바로 적용하여
+    결과를 미리 할당한 출력 스택에 기록합니다.
+    """
+    if out is None:
+        out = np.empty_like(stack)
+
+    clahe = clahe_engine.get(clip_limit, tile_grid_size)
+    for i in range(stack.shape[0]):
+        clahe.apply(stack[i], dst=out[i])
+    return out
+
+def edge_stack(
+    stack: np.ndarray,
+    threshold1: int = 50,
+    threshold2: int = 150,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """(N, H, W) uint8 그레이스케일 스택에 Canny 에지 검출 적용 (출력 스택에 직접 기록)"""
+    if out is None:
+        out = np.empty_like(stack)
+
+    for i in range(stack.shape[0]):
+        cv2.Canny(stack[i], threshold1, threshold2, edges=out[i])
+    return out
+
+
+def gray_stack_to_rgb(stack: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (N, H, W) uint8 스택을 (N, H, W, 3) RGB 스택으로 변환
+
+    채널 축 브로드캐스트 복사보다 cv2.cvtColor가 훨씬 빠르므로 장마다 out에 직접 씁니다.
+    """
+    if out is None:
+        out = np.empty(stack.shape + (3,), dtype=np.uint8)
+    if not out.flags.c_contiguous:
+        out[...] = stack[..., np.newaxis]
+        return out
+    for i in range(stack.shape[0]):
+        cv2.cvtColor(np.ascontiguousarray(stack[i]), cv2.COLOR_GRAY2RGB, dst=out[i])
+    return out
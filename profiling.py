@@ -0,0 +1,188 @@
+# profiling.py
+"""
+요청/파일 단위 프로파일링 도구
+
+특정 영상 처리가 유난히 느리거나 메모리를 많이 쓸 때, 오프라인 재현 없이
+실제 입력으로 cProfile(CPU 시간)과 tracemalloc(메모리 할당)을 함께 기록합니다.
+
+저장 결과 (output_dir):
+    - <profile_id>.prof: cProfile 원본 (snakeviz, pstats 등으로 분석)
+    - <profile_id>.json: 누적 시간 상위 함수, 최대 메모리 시점의 상위 할당 위치 요약
+
+주의:
+    - cProfile과 tracemalloc은 프로세스 전역 자원이므로 동시에 하나의 세션만 실행됩니다 (잠금)
+    - tracemalloc은 Python/NumPy 할당만 추적하며 OpenCV 내부 할당은 보이지 않습니다
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 프로세스 전체에서 동시에 하나의 프로파일링 세션만 허용
+_session_lock = threading.Lock()
+
+
+@dataclass
+class ProfileReport:
+    """프로파일링 세션 결과 요약"""
+    profile_id: str
+    label: str
+    elapsed_seconds: float = 0.0
+    traced_peak_bytes: int = 0
+    top_functions: List[Dict[str, Any]] = field(default_factory=list)
+    peak_allocations: List[Dict[str, Any]] = field(default_factory=list)
+    profile_path: Optional[str] = None
+    summary_path: Optional[str] = None
+
+
+class _PeakSnapshotSampler(threading.Thread):
+    """
+    추적 중인 메모리가 최대치를 갱신할 때마다 tracemalloc 스냅샷을 보관
+
+    세션 종료 시점에는 큰 버퍼가 대부분 해제되어 있으므로,
+    최대 메모리 근처의 스냅샷으로 할당 위치를 분석합니다.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(name="profile-peak-sampler", daemon=True)
+        self.interval = interval
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._best = -1
+        self._stop_event = threading.Event()
+
+    def sample(self) -> None:
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._best:
+            self._best = current
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def _top_functions(profiler: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+    return [
+        {
+            "function": f"{func} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "total_time_s": round(total_time, 6),
+            "cumulative_time_s": round(cumulative_time, 6),
+        }
+        for (filename, line, func), (_, calls, total_time, cumulative_time, _) in rows
+    ]
+
+
+def _top_allocations(snapshot: Optional[tracemalloc.Snapshot], top_n: int) -> List[Dict[str, Any]]:
+    if snapshot is None:
+        return []
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top_n]
+    ]
+
+
+@contextmanager
+def profile_session(label: str, output_dir: str, top_n: int = 25) -> Iterator[ProfileReport]:
+    """
+    블록 실행을 cProfile + tracemalloc으로 프로파일링하고 결과를 저장
+
+    블록에서 예외가 발생해도 결과는 저장됩니다.
+    cProfile은 호출한 스레드만 측정하므로 처리 코드와 같은 스레드에서 사용해야 합니다.
+
+    Args:
+        label: 결과 파일 이름과 요약에 표시할 이름 (예: "preprocess", 파일명)
+        output_dir: 결과 저장 디렉터리
+        top_n: 요약에 포함할 상위 함수/할당 위치 수
+
+    Yields:
+        ProfileReport (블록 종료 후 내용이 채워짐)
+    """
+    safe_label = "".join(c if c.isalnum() or c in "-_." else "_" for c in label)[:64]
+    report = ProfileReport(
+        profile_id=f"{time.strftime('%Y%m%d-%H%M%S')}_{safe_label}_{uuid.uuid4().hex[:8]}",
+        label=label,
+    )
+
+    with _session_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        sampler = _PeakSnapshotSampler()
+        sampler.start()
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report.elapsed_seconds = round(time.perf_counter() - started, 6)
+            sampler.stop()
+            report.traced_peak_bytes = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+
+            report.top_functions = _top_functions(profiler, top_n)
+            report.peak_allocations = _top_allocations(sampler.snapshot, top_n)
+
+            os.makedirs(output_dir, exist_ok=True)
+            report.profile_path = os.path.join(output_dir, f"{report.profile_id}.prof")
+            report.summary_path = os.path.join(output_dir, f"{report.profile_id}.json")
+            profiler.dump_stats(report.profile_path)
+            with open(report.summary_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(report), f, ensure_ascii=False, indent=2)
+
+
+def run_profiled(
+    label: str,
+    output_dir: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    **kwargs: Any
+) -> Tuple[Any, ProfileReport]:
+    """
+    fn(*args, **kwargs)를 프로파일링하며 실행
+
+    Returns:
+        (fn 반환값, ProfileReport) 튜플
+    """
+    with profile_session(label, output_dir) as report:
+        result = fn(*args, **kwargs)
+    return result, report
+
+
+def load_summary(output_dir: str, profile_id: str) -> Optional[Dict[str, Any]]:
+    """저장된 요약(JSON) 로드, 없거나 ID 형식이 잘못되면 None"""
+    if os.sep in profile_id or "/" in profile_id or profile_id.startswith("."):
+        return None
+    path = os.path.join(output_dir, f"{profile_id}.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
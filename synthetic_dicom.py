@@ -0,0 +1,95 @@
+# synthetic_dicom.py
+"""
+합성 DICOM 생성 유틸리티
+
+부하 테스트/벤치마크용으로 실제 환자 데이터 없이 임의 크기의 DICOM을 생성합니다.
+픽셀은 X-ray와 비슷하게 완만한 그라디언트 + 원형 구조물 + 노이즈로 구성되어
+PNG 압축률과 필터 비용이 균일 노이즈보다 실제 영상에 가깝습니다.
+"""
+from io import BytesIO
+
+import numpy as np
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid
+
+
+def make_synthetic_pixels(
+    rows: int,
+    columns: int,
+    bits_stored: int = 12,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    합성 X-ray 유사 픽셀 배열 생성
+
+    Returns:
+        (rows, columns) uint16 배열, 값 범위 [0, 2**bits_stored - 1]
+    """
+    rng = np.random.default_rng(seed)
+    max_val = (1 << bits_stored) - 1
+
+    y, x = np.mgrid[0:rows, 0:columns].astype(np.float32)
+    y /= max(rows - 1, 1)
+    x /= max(columns - 1, 1)
+
+    # 완만한 그라디언트 + 좌우 폐야 모양의 어두운 타원 + 노이즈
+    img = 0.55 + 0.25 * y
+    for cx in (0.3, 0.7):
+        img -= 0.35 * np.exp(-(((x - cx) / 0.15) ** 2 + ((y - 0.5) / 0.3) ** 2))
+    img += rng.normal(0.0, 0.02, size=(rows, columns)).astype(np.float32)
+
+    return (np.clip(img, 0.0, 1.0) * max_val).astype(np.uint16)
+
+
+def make_synthetic_dicom(
+    rows: int = 512,
+    columns: int = 512,
+    bits_stored: int = 12,
+    modality: str = "CR",
+    with_window: bool = True,
+    seed: int = 0
+) -> bytes:
+    """
+    합성 DICOM 파일 바이트 생성 (Explicit VR Little Endian, 비압축)
+
+    Args:
+        rows, columns: 이미지 크기
+        bits_stored: 저장 비트 수 (BitsAllocated는 16 고정)
+        modality: Modality 태그 값
+        with_window: Window Center/Width 태그 포함 여부
+        seed: 노이즈 시드
+
+    Returns:
+        DICOM 파일 바이트
+    """
+    pixels = make_synthetic_pixels(rows, columns, bits_stored, seed)
+
+    file_meta = FileMetaDataset()
+    file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    file_meta.MediaStorageSOPClassUID = SecondaryCaptureImageStorage
+    file_meta.MediaStorageSOPInstanceUID = generate_uid()
+
+    ds = Dataset()
+    ds.file_meta = file_meta
+    ds.SOPClassUID = file_meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.PatientID = "SYNTHETIC"
+    ds.Modality = modality
+    ds.Rows = rows
+    ds.Columns = columns
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = bits_stored
+    ds.HighBit = bits_stored - 1
+    ds.PixelRepresentation = 0
+    ds.RescaleSlope = 1
+    ds.RescaleIntercept = 0
+    if with_window:
+        ds.WindowCenter = (1 << bits_stored) // 2
+        ds.WindowWidth = (1 << bits_stored) // 2
+    ds.PixelData = pixels.tobytes()
+
+    buffer = BytesIO()
+    ds.save_as(buffer, enforce_file_format=True)
+    return buffer.getvalue()